@@ -0,0 +1,134 @@
+# agent.py
+#
+# Lightweight agent for a monitored server. It watches sessions, processes and
+# services locally and pushes change events to the monitor, so the console does
+# not have to poll the server remotely:
+#
+#   python agent.py --monitor 10.0.0.5 --name "Server 1"
+#
+# On Linux it reads `who`, `ps` and `systemctl`, which is enough to run several
+# simulated agents on one box with different --name values.
+
+import argparse
+import json
+import platform
+import socket
+import subprocess
+import sys
+import time
+
+DEFAULT_PORT = 47900
+DEFAULT_INTERVAL = 2  # Seconds between local checks
+DEFAULT_HEARTBEAT = 15  # Seconds between heartbeats when nothing changed
+FIELDS = ('sessions', 'processes', 'services')
+
+CREATE_NO_WINDOW = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
+
+def encode(message):
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def _run(args):
+    try:
+        return subprocess.run(args, capture_output=True, text=True, creationflags=CREATE_NO_WINDOW).stdout
+    except OSError:
+        return ""
+
+
+def windows_snapshot():
+    sessions = [line.split()[1] for line in _run(["qwinsta"]).splitlines()[1:] if "rdp-tcp#" in line.lower()]
+    processes = {line.split('","')[0].strip('"') for line in _run(["tasklist", "/NH", "/FO", "CSV"]).splitlines()
+                 if line.startswith('"')}
+    # `sc query` lists active services; keep the ones actually RUNNING
+    running = set()
+    current = None
+    for line in _run(["sc", "query"]).splitlines():
+        line = line.strip()
+        if line.startswith("SERVICE_NAME:"):
+            current = line.split(':', 1)[1].strip()
+        elif line.startswith("STATE") and "RUNNING" in line and current:
+            running.add(current)
+    return {'sessions': sorted(set(sessions)), 'processes': sorted(processes), 'services': sorted(running)}
+
+
+def linux_snapshot():
+    sessions = {line.split()[0] for line in _run(["who"]).splitlines() if line.strip()}
+    processes = {line.strip() for line in _run(["ps", "-eo", "comm="]).splitlines() if line.strip()}
+    units = _run(["systemctl", "list-units", "--type=service", "--state=running", "--no-legend", "--plain"])
+    services = {line.split()[0].rsplit('.service', 1)[0] for line in units.splitlines() if line.strip()}
+    return {'sessions': sorted(sessions), 'processes': sorted(processes), 'services': sorted(services)}
+
+
+def diff(old, new):
+    added, removed = {}, {}
+    for field in FIELDS:
+        before, after = set(old.get(field, ())), set(new.get(field, ()))
+        if after - before:
+            added[field] = sorted(after - before)
+        if before - after:
+            removed[field] = sorted(before - after)
+    return added, removed
+
+
+class Agent:
+    def __init__(self, name, monitor, port=DEFAULT_PORT, interval=DEFAULT_INTERVAL,
+                 heartbeat=DEFAULT_HEARTBEAT, token=None, snapshot=None):
+        self.name = name
+        self.monitor = monitor
+        self.port = port
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.token = token
+        self.snapshot = snapshot or (windows_snapshot if platform.system() == 'Windows' else linux_snapshot)
+        self.seq = 0
+
+    def message(self, kind, **fields):
+        self.seq += 1
+        return encode({'type': kind, 'host': self.name, 'seq': self.seq, **fields})
+
+    def run(self):
+        backoff = 1
+        while True:
+            try:
+                with socket.create_connection((self.monitor, self.port), timeout=10) as sock:
+                    backoff = 1
+                    self.stream(sock)
+            except OSError:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+    def stream(self, sock):
+        state = self.snapshot()
+        sock.sendall(self.message('hello', token=self.token, **state))
+        last_sent = time.monotonic()
+        while True:
+            time.sleep(self.interval)
+            current = self.snapshot()
+            added, removed = diff(state, current)
+            if added or removed:
+                sock.sendall(self.message('change', added=added, removed=removed))
+                state = current
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= self.heartbeat:
+                sock.sendall(self.message('heartbeat'))
+                last_sent = time.monotonic()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RDP Server Monitor agent")
+    parser.add_argument('--monitor', required=True, help="Address of the machine running the monitor")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--name', default=socket.gethostname(), help="Server name as configured in the monitor")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL)
+    parser.add_argument('--heartbeat', type=float, default=DEFAULT_HEARTBEAT)
+    parser.add_argument('--token', required=True, help="Shared secret configured in the monitor")
+    args = parser.parse_args(argv)
+    try:
+        Agent(args.name, args.monitor, args.port, args.interval, args.heartbeat, args.token).run()
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
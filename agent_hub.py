@@ -0,0 +1,201 @@
+# agent_hub.py
+
+import hmac
+import json
+import logging
+import selectors
+import socket
+import time
+
+from agent import DEFAULT_PORT, FIELDS
+
+DEFAULT_STALE_AFTER = 45  # Seconds without a message before a host falls back to remote polling
+MAX_LINE = 1 << 20
+
+log = logging.getLogger(__name__)
+
+
+class AgentState:
+    __slots__ = ('name', 'peer', 'sessions', 'processes', 'services', 'seq', 'last_seen')
+
+    def __init__(self, name, peer):
+        self.name = name
+        self.peer = peer
+        self.sessions = set()
+        self.processes = set()
+        self.services = set()
+        self.seq = 0
+        self.last_seen = time.monotonic()
+
+
+class AgentHub:
+    """ Receives change events and heartbeats pushed by agent.py over TCP.
+
+    A single selector loop serves every agent connection; serve() returns the
+    hosts whose sessions, processes or services changed since the last call.
+    Agents must present the shared token in their hello, and a host name
+    belongs to one connection at a time.
+    """
+
+    def __init__(self, bind='0.0.0.0', port=DEFAULT_PORT, token=None, stale_after=DEFAULT_STALE_AFTER):
+        self.bind = bind
+        self.port = port
+        self.token = token
+        self.stale_after = stale_after
+        self.selector = selectors.DefaultSelector()
+        self.server = None
+        self.agents = {}  # host name -> AgentState
+        self.buffers = {}  # socket -> bytearray
+        self.connections = {}  # host name -> socket that said hello for it
+
+    def start(self):
+        if not self.token:
+            raise ValueError("the agent hub requires a token")
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((self.bind, self.port))
+        self.server.listen()
+        self.server.setblocking(False)
+        self.port = self.server.getsockname()[1]
+        self.selector.register(self.server, selectors.EVENT_READ)
+
+    def is_live(self, name, now=None):
+        agent = self.agents.get(name)
+        now = time.monotonic() if now is None else now
+        return agent is not None and now - agent.last_seen < self.stale_after
+
+    def serve(self, timeout=None):
+        changed = {}
+        for key, _ in self.selector.select(timeout):
+            if key.fileobj is self.server:
+                self._accept()
+            else:
+                try:
+                    self._read(key.fileobj, changed)
+                except Exception:
+                    # One misbehaving agent must not stop the hub serving the others
+                    log.exception("Dropping agent connection after an unexpected error")
+                    self._disconnect(key.fileobj)
+        return list(changed.values())
+
+    def close(self):
+        for sock in list(self.buffers):
+            self._disconnect(sock)
+        if self.server is not None:
+            self.selector.unregister(self.server)
+            self.server.close()
+            self.server = None
+        self.selector.close()
+
+    def _accept(self):
+        try:
+            sock, _ = self.server.accept()
+        except OSError:
+            return
+        sock.setblocking(False)
+        self.buffers[sock] = bytearray()
+        self.selector.register(sock, selectors.EVENT_READ, data=None)
+
+    def _read(self, sock, changed):
+        try:
+            data = sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._disconnect(sock)
+            return
+
+        buffer = self.buffers[sock]
+        buffer.extend(data)
+        while True:
+            end = buffer.find(b'\n')
+            if end < 0:
+                if len(buffer) > MAX_LINE:
+                    self._disconnect(sock)
+                return
+            line = bytes(buffer[:end])
+            del buffer[:end + 1]
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if not self._apply(sock, message, changed):
+                self._disconnect(sock)
+                return
+
+    def _apply(self, sock, message, changed):
+        if not _is_valid(message):
+            return False
+        kind = message.get('type')
+        name = message['host']
+
+        if kind == 'hello':
+            token = message.get('token')
+            if not isinstance(token, str) or not hmac.compare_digest(token.encode('utf-8'),
+                                                                     self.token.encode('utf-8')):
+                return False
+            owner = self.connections.get(name)
+            if owner is not None and owner is not sock:
+                return False  # Another connection speaks for this host
+            previous = self.selector.get_key(sock).data
+            if previous is not None and previous != name:
+                return False
+            self.connections[name] = sock
+            agent = self.agents.get(name)
+            if agent is None:
+                agent = self.agents[name] = AgentState(name, sock.getpeername()[0])
+            agent.peer = sock.getpeername()[0]
+            for field in FIELDS:
+                setattr(agent, field, set(message.get(field, ())))
+            self.selector.modify(sock, selectors.EVENT_READ, data=name)
+            changed[name] = agent
+        else:
+            # Changes and heartbeats are only accepted on a connection that said hello
+            if self.selector.get_key(sock).data != name or name not in self.agents:
+                return False
+            agent = self.agents[name]
+            if kind == 'change':
+                for field in FIELDS:
+                    values = getattr(agent, field)
+                    values.difference_update(message.get('removed', {}).get(field, ()))
+                    values.update(message.get('added', {}).get(field, ()))
+                changed[name] = agent
+
+        seq = message.get('seq', agent.seq)
+        if isinstance(seq, int):
+            agent.seq = seq
+        agent.last_seen = time.monotonic()
+        return True
+
+    def _disconnect(self, sock):
+        self.buffers.pop(sock, None)
+        try:
+            name = self.selector.get_key(sock).data
+            self.selector.unregister(sock)
+        except (KeyError, ValueError):
+            name = None
+        sock.close()
+        if name is not None and self.connections.get(name) is sock:
+            del self.connections[name]
+        if name in self.agents:
+            # Fall back to remote polling straight away rather than after stale_after
+            self.agents[name].last_seen = float('-inf')
+
+
+def _is_str_list(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _is_valid(message):
+    """ Whether a decoded message has the shape agent.py sends """
+    if not isinstance(message, dict) or not isinstance(message.get('host'), str) or not message['host']:
+        return False
+    if not all(_is_str_list(message[field]) for field in FIELDS if field in message):
+        return False
+    for key in ('added', 'removed'):
+        delta = message.get(key, {})
+        if not isinstance(delta, dict) or not all(_is_str_list(delta[field]) for field in FIELDS if field in delta):
+            return False
+    return True
@@ -0,0 +1,279 @@
+# alerts.py
+
+import bisect
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+# Rule types, as used in the "alert_rules" section of server_config.json
+IT_USER = 'it_user'
+SERVICE_DOWN = 'service_down'
+SESSIONS_ABOVE = 'sessions_above'
+HOST_UNREACHABLE = 'host_unreachable'
+
+DEFAULT_RULES = [{'type': IT_USER}]
+DEFAULT_SINKS = [{'type': 'tray'}]
+DEFAULT_COOLDOWN = 600  # Seconds before the same alert may notify again
+MAX_NOTIFICATIONS_PER_MINUTE = 30
+
+log = logging.getLogger(__name__)
+
+
+class Alert:
+    __slots__ = ('rule', 'kind', 'host', 'subject', 'message', 'since')
+
+    def __init__(self, rule, kind, host, subject, message, since):
+        self.rule = rule
+        self.kind = kind
+        self.host = host
+        self.subject = subject
+        self.message = message
+        self.since = since
+
+    @property
+    def key(self):
+        return self.rule, self.host, self.subject
+
+    def to_dict(self):
+        return {'rule': self.rule, 'type': self.kind, 'host': self.host, 'subject': self.subject,
+                'message': self.message, 'since': datetime.fromtimestamp(self.since).isoformat()}
+
+
+class _HostState:
+    __slots__ = ('users', 'service_down_polls', 'down_since', 'active')
+
+    def __init__(self):
+        self.users = ()
+        self.service_down_polls = {}  # service -> consecutive polls not RUNNING
+        self.down_since = None
+        self.active = {}  # Alert.key -> Alert
+
+
+class _Rule:
+    __slots__ = ('id', 'kind', 'hosts', 'params')
+
+    def __init__(self, rule_id, spec):
+        self.id = rule_id
+        self.kind = spec['type']
+        hosts = spec.get('hosts')
+        self.hosts = frozenset(hosts) if hosts else None
+        self.params = spec
+
+    def applies_to(self, host):
+        return self.hosts is None or host in self.hosts
+
+
+class AlertEngine:
+    """ Evaluates declarative alert rules against each poll result.
+
+    Rules are compiled into dict/set lookups keyed by user and service, and into
+    sorted thresholds for session counts and outage durations, so the cost of a
+    poll depends on what the host reports rather than on how many rules exist.
+    Notifications are deduplicated while an alert stays active and rate-limited
+    per alert and globally before they reach the sinks.
+    """
+
+    def __init__(self, rules=None, ti_users=(), sinks=(), cooldown=DEFAULT_COOLDOWN):
+        self.sinks = list(sinks)
+        self.cooldown = cooldown
+        self.hosts = {}
+        self.last_notified = {}
+        self.suppressed = 0
+        self.sink_failures = 0
+        self.tokens = MAX_NOTIFICATIONS_PER_MINUTE
+        self.tokens_updated = time.monotonic()
+        self.compile(DEFAULT_RULES if rules is None else rules, ti_users)
+
+    def compile(self, rules, ti_users):
+        self.user_rules = {}     # casefolded user -> [rule]
+        self.service_rules = {}  # service -> [rule]; '*' matches every watched service
+        self.session_rules = []  # sorted by threshold
+        self.unreachable_rules = []  # sorted by seconds
+        for idx, spec in enumerate(rules):
+            rule = _Rule(spec.get('id', f"{spec['type']}#{idx}"), spec)
+            if rule.kind == IT_USER:
+                for user in spec.get('users', ti_users):
+                    self.user_rules.setdefault(user.casefold(), []).append(rule)
+            elif rule.kind == SERVICE_DOWN:
+                self.service_rules.setdefault(spec.get('service', '*'), []).append(rule)
+            elif rule.kind == SESSIONS_ABOVE:
+                self.session_rules.append((int(spec['max']), rule))
+            elif rule.kind == HOST_UNREACHABLE:
+                self.unreachable_rules.append((float(spec.get('minutes', 5)) * 60, rule))
+        self.session_rules.sort(key=lambda item: item[0])
+        self.unreachable_rules.sort(key=lambda item: item[0])
+        self.session_thresholds = [threshold for threshold, _ in self.session_rules]
+        self.unreachable_thresholds = [seconds for seconds, _ in self.unreachable_rules]
+
+    def observe(self, host, users, services, running_services, reachable, now=None):
+        """ Record one poll result for a host and return the alerts it newly raised.
+
+        users is None when the host answered but the probe failed; that ends an
+        outage without replacing the last known sessions and services.
+        """
+        now = time.time() if now is None else now
+        state = self.hosts.setdefault(host, _HostState())
+
+        if reachable:
+            state.down_since = None
+        if reachable and users is not None:
+            state.users = tuple(users)
+            running = set(running_services)
+            polls = state.service_down_polls
+            for service in services:
+                polls[service] = 0 if service in running else polls.get(service, 0) + 1
+            for service in set(polls) - set(services):
+                del polls[service]
+        elif not reachable and state.down_since is None:
+            state.down_since = now
+
+        return self._check(host, state, now)
+
+    def recheck(self, host, now=None):
+        """ Re-evaluate the last result of a host, e.g. after the rules changed """
+        state = self.hosts.get(host)
+        if state is None:
+            return []
+        return self._check(host, state, time.time() if now is None else now)
+
+    def forget(self, host):
+        self.hosts.pop(host, None)
+        for key in [key for key in self.last_notified if key[1] == host]:
+            del self.last_notified[key]
+
+    def active_alerts(self, host):
+        state = self.hosts.get(host)
+        return list(state.active.values()) if state else []
+
+    def _check(self, host, state, now):
+        current = {}
+
+        if state.down_since is not None:
+            down_for = now - state.down_since
+            count = bisect.bisect_right(self.unreachable_thresholds, down_for)
+            for seconds, rule in self.unreachable_rules[:count]:
+                if rule.applies_to(host):
+                    self._raise(current, state, rule, host, '',
+                                f"{host} unreachable for {int(down_for // 60)} min", now)
+        else:
+            for user in state.users:
+                for rule in self.user_rules.get(user.casefold(), ()):
+                    if rule.applies_to(host):
+                        self._raise(current, state, rule, host, user, f"IT user {user} logged in on {host}", now)
+
+            for service, polls in state.service_down_polls.items():
+                if not polls:
+                    continue
+                for rule in self.service_rules.get(service, []) + self.service_rules.get('*', []):
+                    if polls > rule.params.get('polls', 2) and rule.applies_to(host):
+                        self._raise(current, state, rule, host, service,
+                                    f"{service} not RUNNING on {host} for {polls} polls", now)
+
+            sessions = len(state.users)
+            count = bisect.bisect_left(self.session_thresholds, sessions)
+            for threshold, rule in self.session_rules[:count]:
+                if rule.applies_to(host):
+                    self._raise(current, state, rule, host, '',
+                                f"{sessions} sessions on {host} (max {threshold})", now)
+
+        raised = [alert for key, alert in current.items() if key not in state.active]
+        state.active = current
+        for alert in raised:
+            self._notify(alert, now)
+        return raised
+
+    def _raise(self, current, state, rule, host, subject, message, now):
+        key = (rule.id, host, subject)
+        previous = state.active.get(key)
+        current[key] = Alert(rule.id, rule.kind, host, subject, message,
+                             previous.since if previous else now)
+
+    def _notify(self, alert, now):
+        # Entries past the cooldown no longer suppress anything
+        for key in [key for key, last in self.last_notified.items() if now - last >= self.cooldown]:
+            del self.last_notified[key]
+        if alert.key in self.last_notified:
+            return
+
+        # Token bucket shared by all alerts, so a fleet-wide outage cannot flood the sinks
+        elapsed = time.monotonic() - self.tokens_updated
+        self.tokens = min(MAX_NOTIFICATIONS_PER_MINUTE, self.tokens + elapsed * MAX_NOTIFICATIONS_PER_MINUTE / 60)
+        self.tokens_updated = time.monotonic()
+        if self.tokens < 1:
+            self.suppressed += 1
+            return
+        self.tokens -= 1
+
+        self.last_notified[alert.key] = now
+        for sink in self.sinks:
+            try:
+                sink.emit(alert)
+            except Exception:
+                self.sink_failures += 1
+                log.exception("Alert sink %s failed", type(sink).__name__)
+
+
+class TraySink:
+    def __init__(self, notify):
+        self.notify = notify
+
+    def emit(self, alert):
+        self.notify(alert.host, alert.message)
+
+
+class LogFileSink:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def emit(self, alert):
+        line = f"{datetime.fromtimestamp(alert.since).strftime('%Y-%m-%d %H:%M:%S')} [{alert.kind}] {alert.message}\n"
+        with self.lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+class WebhookSink:
+    """ POSTs alerts as JSON from a background thread; drops them if the endpoint falls behind """
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=100)
+        self.dropped = 0
+        self.failures = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def emit(self, alert):
+        try:
+            self.queue.put_nowait(alert.to_dict())
+        except queue.Full:
+            self.dropped += 1
+
+    def run(self):
+        import urllib.request  # Only webhook sinks need it, so it stays off the startup path
+        while True:
+            payload = self.queue.get()
+            request = urllib.request.Request(self.url, data=json.dumps(payload).encode('utf-8'),
+                                             headers={'Content-Type': 'application/json'}, method='POST')
+            try:
+                urllib.request.urlopen(request, timeout=self.timeout).close()
+            except Exception as e:
+                self.failures += 1
+                log.warning("Webhook %s failed: %s", self.url, e)
+
+
+def build_sinks(specs, tray_notify=None):
+    sinks = []
+    for spec in specs:
+        kind = spec.get('type')
+        if kind == 'tray' and tray_notify is not None:
+            sinks.append(TraySink(tray_notify))
+        elif kind == 'webhook':
+            sinks.append(WebhookSink(spec['url'], spec.get('timeout', 5)))
+        elif kind == 'log':
+            sinks.append(LogFileSink(spec.get('path', 'alerts.log')))
+    return sinks
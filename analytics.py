@@ -0,0 +1,343 @@
+# analytics.py
+
+import csv
+import importlib.util
+import json
+import os
+import shutil
+import struct
+import threading
+import time
+
+# Sessions are recorded without NumPy; only the reports need it, so it is imported on first use
+np = None
+
+# Fixed-size little-endian records, appended in time order
+SAMPLE = struct.Struct('<IHH')  # minute, host id, sessions
+DWELL = struct.Struct('<IIHH')  # start minute, end minute, host id, user id
+SAMPLE_DTYPE = [('minute', '<u4'), ('host', '<u2'), ('sessions', '<u2')]
+DWELL_DTYPE = [('start', '<u4'), ('end', '<u4'), ('host', '<u2'), ('user', '<u2')]
+
+SAMPLES_FILE = 'sessions.bin'
+DWELL_FILE = 'dwell.bin'
+NAMES_FILE = 'names.json'
+PRUNE_INTERVAL = 86400  # Seconds between background prunes, started by flush()
+CARRY_MINUTES = 10  # A host's last count stands in for up to this many minutes it was not polled
+
+OVER = 'over'
+UNDER = 'under'
+
+
+def has_numpy():
+    return np is not None or importlib.util.find_spec('numpy') is not None
+
+
+def _load_numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+
+
+def _first_at_or_after(f, count, record, field, value):
+    """ Binary search an open file of `count` time-ordered records for the first one whose field >= value """
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        f.seek(mid * record.size)
+        if record.unpack(f.read(record.size))[field] < value:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class SessionStore:
+    """ Per-minute session counts and finished session dwell times per host.
+
+    Samples are kept as 8-byte records (the highest count seen per host and
+    minute) and finished sessions as 12-byte records, in append-only files that
+    load straight into NumPy structured arrays. Host and user names are stored
+    once in names.json and referenced by id. Old records are pruned in a
+    background thread once a day, started by flush().
+    """
+
+    def __init__(self, path, retention_days=35):
+        self.path = path
+        self.retention_days = retention_days
+        os.makedirs(path, exist_ok=True)
+        try:
+            with open(os.path.join(path, NAMES_FILE), 'r') as f:
+                names = json.load(f)
+        except (FileNotFoundError, ValueError):
+            names = {}
+        self.hosts = names.get('hosts', [])
+        self.users = names.get('users', [])
+        self.host_ids = {name: idx for idx, name in enumerate(self.hosts)}
+        self.user_ids = {name: idx for idx, name in enumerate(self.users)}
+        self.names_dirty = False
+        self.samples = bytearray()
+        self.dwells = bytearray()
+        self.pending = {}  # host id -> [minute, highest session count in that minute]
+        self.open_sessions = {}  # host id -> {user id: start minute}
+        self.file_lock = threading.Lock()  # Held while appending and while prune() swaps a file
+        self.prune_thread = None
+        self.pruned_at = float('-inf')
+        for name, record in ((SAMPLES_FILE, SAMPLE), (DWELL_FILE, DWELL)):
+            # Drop a partial record from a crash, so new records stay aligned
+            file_path = os.path.join(path, name)
+            try:
+                size = os.path.getsize(file_path)
+            except OSError:
+                continue
+            if size % record.size:
+                os.truncate(file_path, size - size % record.size)
+
+    def _id(self, ids, names, name):
+        idx = ids.get(name)
+        if idx is None:
+            idx = ids[name] = len(names)
+            names.append(name)
+            self.names_dirty = True
+        return idx
+
+    def observe(self, host, users, now=None):
+        """ Record the sessions of an online host after a poll """
+        minute = int((time.time() if now is None else now) // 60)
+        host_id = self._id(self.host_ids, self.hosts, host)
+
+        pending = self.pending.get(host_id)
+        if pending is not None and pending[0] == minute:
+            pending[1] = max(pending[1], len(users))
+        else:
+            if pending is not None:
+                self.samples += SAMPLE.pack(pending[0], host_id, min(pending[1], 0xFFFF))
+            self.pending[host_id] = [minute, len(users)]
+
+        current = {self._id(self.user_ids, self.users, user) for user in users}
+        sessions = self.open_sessions.setdefault(host_id, {})
+        for user_id in [user_id for user_id in sessions if user_id not in current]:
+            self.dwells += DWELL.pack(sessions.pop(user_id), minute, host_id, user_id)
+        for user_id in current:
+            sessions.setdefault(user_id, minute)
+
+    def forget(self, host):
+        self.open_sessions.pop(self.host_ids.get(host), None)
+
+    def flush(self, now=None, final=False):
+        """ Append finished minutes to disk; final also writes the current minute """
+        minute = int((time.time() if now is None else now) // 60)
+        for host_id, (sample_minute, sessions) in list(self.pending.items()):
+            if final or sample_minute < minute:
+                self.samples += SAMPLE.pack(sample_minute, host_id, min(sessions, 0xFFFF))
+                del self.pending[host_id]
+        for name, buffer in ((SAMPLES_FILE, self.samples), (DWELL_FILE, self.dwells)):
+            if buffer:
+                with self.file_lock, open(os.path.join(self.path, name), 'ab') as f:
+                    f.write(buffer)
+                buffer.clear()
+        if self.names_dirty:
+            with open(os.path.join(self.path, NAMES_FILE), 'w') as f:
+                json.dump({'hosts': self.hosts, 'users': self.users}, f)
+            self.names_dirty = False
+        if not final and time.monotonic() - self.pruned_at >= PRUNE_INTERVAL:
+            self.start_prune()
+
+    def start_prune(self):
+        if self.prune_thread is None or not self.prune_thread.is_alive():
+            self.pruned_at = time.monotonic()
+            self.prune_thread = threading.Thread(target=self.prune, name='analytics-prune', daemon=True)
+            self.prune_thread.start()
+
+    def prune(self, now=None):
+        """ Drop records older than retention_days, leaving files untouched when nothing is that old.
+
+        The first record to keep is found by a binary search over the file and
+        the rest is copied to a new file in chunks without holding file_lock;
+        only the records appended meanwhile are copied under it, before the swap.
+        """
+        cutoff = int((time.time() if now is None else now) // 60) - self.retention_days * 1440
+        for name, record, field in ((SAMPLES_FILE, SAMPLE, 0), (DWELL_FILE, DWELL, 1)):
+            path = os.path.join(self.path, name)
+            temp_path = path + '.prune'
+            try:
+                with open(path, 'rb') as f:
+                    count = os.fstat(f.fileno()).st_size // record.size
+                    start = _first_at_or_after(f, count, record, field, cutoff)
+                    if not start:
+                        continue
+                    f.seek(start * record.size)
+                    with open(temp_path, 'wb') as out:
+                        shutil.copyfileobj(f, out, 1 << 20)
+                        copied = f.tell()
+                with self.file_lock:
+                    with open(path, 'rb') as f, open(temp_path, 'ab') as out:
+                        f.seek(copied)
+                        shutil.copyfileobj(f, out)
+                    os.replace(temp_path, path)
+            except FileNotFoundError:
+                continue
+            except OSError:
+                # E.g. the report is reading the file on Windows; try again at the next prune
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+    def load(self):
+        """ All flushed records as (samples, dwells) NumPy structured arrays """
+        _load_numpy()
+        arrays = []
+        for name, dtype in ((SAMPLES_FILE, SAMPLE_DTYPE), (DWELL_FILE, DWELL_DTYPE)):
+            path = os.path.join(self.path, name)
+            if os.path.exists(path):
+                size = np.dtype(dtype).itemsize
+                arrays.append(np.fromfile(path, dtype=dtype, count=os.path.getsize(path) // size))
+            else:
+                arrays.append(np.zeros(0, dtype=dtype))
+        return tuple(arrays)
+
+
+def _group_stats(groups, values, n_groups):
+    """ Samples, peak, p95 and mean of small non-negative integers per group, from a 2-D histogram """
+    width = int(values.max()) + 1 if values.size else 1
+    hist = np.bincount(groups * width + values, minlength=n_groups * width).reshape(n_groups, width)
+    counts = hist.sum(axis=1)
+    # p95 is the first bin where the running count reaches 95% of the group's samples
+    p95 = (hist.cumsum(axis=1) < np.ceil(counts * 0.95)[:, None]).sum(axis=1)
+    peak = np.where(counts > 0, width - 1 - (hist[:, ::-1] > 0).argmax(axis=1), 0)
+    mean = hist @ np.arange(width) / np.maximum(counts, 1)
+    return counts, peak, p95, mean
+
+
+def _fleet_totals(key, offset, sessions, sampled, grid, n_minutes, carry_minutes):
+    """ Fleet-wide sessions per minute offset, and whether any host counted in that minute.
+
+    Hosts are polled at different intervals, so a host's last count is carried
+    into the following minutes that have no sample of its own, for at most
+    carry_minutes. Only samples followed by a gap take part in each step, so
+    hosts polled every minute cost a single pass.
+    """
+    totals = grid.sum(axis=0, dtype=np.int64)[:n_minutes]
+    covered = sampled.any(axis=0)[:n_minutes]
+    live = np.flatnonzero(~sampled.ravel()[key + 1])
+    for step in range(1, carry_minutes + 1):
+        if step > 1:
+            live = live[~sampled.ravel()[key[live] + step]]
+        target = offset[live] + step
+        inside = target < n_minutes
+        live, target = live[inside], target[inside]
+        if not live.size:
+            break
+        totals += np.bincount(target, weights=sessions[live], minlength=n_minutes).astype(np.int64)
+        covered[target] = True
+    return totals, covered
+
+
+def _hour_of_week(local_hours):
+    # Monday 00h = 0; 1970-01-01 was a Thursday
+    return ((local_hours // 24 + 3) % 7) * 24 + local_hours % 24
+
+
+def build_report(samples, dwells, hosts, users, days=None, now=None, utc_offset=None, over_ratio=1.25,
+                 under_ratio=0.5, persistence=0.75, carry_minutes=CARRY_MINUTES):
+    """ Capacity rollups over the last `days` days (all data if None).
+
+    Returns {'hosts': [...], 'hour_of_week': [...], 'users': [...]}, lists of
+    row dicts. A host is over (under) used when its hourly mean is above
+    over_ratio (below under_ratio) times the fleet's hourly mean in at least
+    `persistence` of the hours it was polled. Fleet-wide totals carry each
+    host's last count forward for up to carry_minutes between its polls.
+    """
+    _load_numpy()
+    now_minute = int((time.time() if now is None else now) // 60)
+    if utc_offset is None:
+        utc_offset = time.localtime().tm_gmtoff // 60
+    if days:
+        samples = samples[samples['minute'] >= now_minute - days * 1440]
+        dwells = dwells[dwells['end'] >= now_minute - days * 1440]
+
+    n_hosts = max(len(hosts), 1)
+    minute = samples['minute'].astype(np.int64)
+    host = samples['host'].astype(np.int64)
+    sessions = samples['sessions'].astype(np.int64)
+    first = int(minute.min()) if minute.size else 0
+    first_hour = (first + utc_offset) // 60
+
+    # Per-host peak, p95 and mean
+    counts, peak, p95, mean = _group_stats(host, sessions, n_hosts)
+
+    # A host x minute grid of which minutes were sampled, starting at the first local hour. Rows are whole hours
+    # with room for carry_minutes past the last sample, so key // 60 is the host x local hour cell of a sample
+    offset = minute - (first_hour * 60 - utc_offset)
+    n_minutes = int(offset.max()) + 1 if offset.size else 1
+    n_hours = (n_minutes + 59) // 60
+    row_hours = (n_minutes + carry_minutes + 59) // 60
+    key = host * (row_hours * 60) + offset
+    sampled = np.zeros((n_hosts, row_hours * 60), dtype=bool)
+    sampled.ravel()[key] = True
+    grid = np.zeros(sampled.shape, dtype=np.uint16)
+    grid.ravel()[key] = sessions
+
+    # Everything hourly works on a small host x local hour grid
+    cell_n = sampled.reshape(n_hosts, row_hours, 60).sum(axis=2)[:, :n_hours]
+    cell_sum = grid.reshape(n_hosts, row_hours, 60).sum(axis=2, dtype=np.int64)[:, :n_hours]
+    grid_hour_of_week = _hour_of_week(np.arange(n_hours) + first_hour)
+
+    # Busiest hour of the week per host
+    week_cell = (np.arange(n_hosts)[:, None] * 168 + grid_hour_of_week).ravel()
+    week_sum = np.bincount(week_cell, weights=cell_sum.ravel(), minlength=n_hosts * 168)
+    week_n = np.bincount(week_cell, weights=cell_n.ravel(), minlength=n_hosts * 168)
+    busiest = (week_sum / np.maximum(week_n, 1)).reshape(n_hosts, 168).argmax(axis=1)
+
+    # Persistent over/under use against the fleet mean of each hour
+    polled = cell_n > 0
+    cell_mean = cell_sum / np.maximum(cell_n, 1)
+    fleet_mean = cell_mean.sum(axis=0) / np.maximum(polled.sum(axis=0), 1)
+    hours_polled = np.maximum(polled.sum(axis=1), 1)
+    over = ((cell_mean > over_ratio * fleet_mean) & polled).sum(axis=1) / hours_polled >= persistence
+    under = ((cell_mean < under_ratio * fleet_mean) & polled).sum(axis=1) / hours_polled >= persistence
+
+    # Dwell times in minutes
+    duration = (dwells['end'].astype(np.int64) - dwells['start'])
+    dwell_host = dwells['host'].astype(np.int64)
+    host_dwell_n = np.bincount(dwell_host, minlength=n_hosts)
+    host_dwell = np.bincount(dwell_host, weights=duration, minlength=n_hosts) / np.maximum(host_dwell_n, 1)
+
+    host_rows = []
+    for idx in np.flatnonzero(counts):
+        host_rows.append({
+            'host': hosts[idx], 'samples': int(counts[idx]), 'peak': int(peak[idx]), 'p95': int(p95[idx]),
+            'mean': round(float(mean[idx]), 2), 'busiest_hour': int(busiest[idx]),
+            'mean_dwell': round(float(host_dwell[idx]), 1) if host_dwell_n[idx] else None,
+            'usage': OVER if over[idx] else UNDER if under[idx] else ''})
+
+    # Fleet-wide concurrent sessions per minute, rolled up per hour of the week
+    totals, covered = _fleet_totals(key, offset, sessions, sampled, grid, n_minutes, carry_minutes)
+    seen = np.flatnonzero(covered)
+    fleet_hour = _hour_of_week(seen // 60 + first_hour)
+    fleet_counts, fleet_peak, fleet_p95, fleet_mean = _group_stats(fleet_hour, totals[seen], 168)
+    hour_rows = [{'day': int(idx // 24), 'hour': int(idx % 24), 'samples': int(fleet_counts[idx]),
+                  'peak': int(fleet_peak[idx]), 'p95': int(fleet_p95[idx]), 'mean': round(float(fleet_mean[idx]), 2)}
+                 for idx in np.flatnonzero(fleet_counts)]
+
+    user_rows = []
+    if duration.size:
+        user = dwells['user'].astype(np.int64)
+        order = np.lexsort((duration, user))
+        user_sorted, duration_sorted = user[order], duration[order]
+        ids, starts, user_counts = np.unique(user_sorted, return_index=True, return_counts=True)
+        medians = duration_sorted[starts + (user_counts - 1) // 2]
+        totals = np.add.reduceat(duration_sorted, starts)
+        for idx in np.argsort(-totals, kind='stable'):
+            user_rows.append({'user': users[ids[idx]], 'sessions': int(user_counts[idx]),
+                              'total_hours': round(float(totals[idx]) / 60, 1),
+                              'median_minutes': int(medians[idx])})
+
+    return {'hosts': host_rows, 'hour_of_week': hour_rows, 'users': user_rows}
+
+
+def write_csv(rows, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        if rows:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
@@ -0,0 +1,224 @@
+# capture.py
+
+import atexit
+import bisect
+import gzip
+import json
+import subprocess
+import sys
+import threading
+import time
+import zlib
+
+import probes
+import reachability
+
+FORMAT_VERSION = 1
+FLUSH_INTERVAL = 1.0  # Seconds between gzip sync flushes, so a crash loses at most this much
+
+_backend = None
+
+
+def _key(args):
+    return "\0".join(args)
+
+
+def read_records(path):
+    """ Yield every record of a capture file, stopping quietly at a truncated tail """
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    return
+    except (EOFError, OSError, zlib.error):
+        return
+
+
+class Recorder:
+    """ Appends raw probe output to a gzip-compressed JSON lines file.
+
+    Each session starts with a header record; every command and reachability
+    check after it is one line with its offset from the session start ('t'),
+    duration ('ms') and result. Reopening the same file appends a new gzip
+    member, which readers see as one continuous stream.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = gzip.open(path, 'at', encoding='utf-8')
+        self.started = time.monotonic()
+        self.flushed = self.started
+        self.live_run = probes.run_command
+        self.live_check = reachability.checker
+        self._write({'header': FORMAT_VERSION, 'started': time.time()})
+
+    def run(self, args, **kwargs):
+        start = time.monotonic()
+        try:
+            result = self.live_run(args, **kwargs)
+        except Exception as e:
+            self._write({'t': start - self.started, 'ms': (time.monotonic() - start) * 1000,
+                         'cmd': list(args), 'exc': str(e)})
+            raise
+        self._write({'t': start - self.started, 'ms': (time.monotonic() - start) * 1000, 'cmd': list(args),
+                     'rc': result.returncode, 'out': result.stdout, 'err': result.stderr})
+        return result
+
+    def check(self, ips, ports, timeout):
+        start = time.monotonic()
+        latencies = self.live_check(ips, ports, timeout)
+        self._write({'t': start - self.started, 'ms': (time.monotonic() - start) * 1000, 'reach': latencies})
+        return latencies
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+    def _write(self, record):
+        line = json.dumps(record, separators=(',', ':')) + "\n"
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(line)
+            now = time.monotonic()
+            if now - self.flushed >= FLUSH_INTERVAL or 'header' in record:
+                self.file.flush()
+                self.flushed = now
+
+
+class Replayer:
+    """ Serves recorded probe output back through the normal probe pipeline.
+
+    With speed > 0 the capture is a timeline: a probe issued after `elapsed`
+    seconds gets the latest recording of the same command at elapsed * speed,
+    after sleeping its recorded duration / speed. The timeline loops at the
+    end. With speed 0 each command simply steps through its recordings with
+    no delays, for profiling.
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.speed = speed
+        self.lock = threading.Lock()
+        self.commands = {}  # key -> (times, records)
+        self.reach = {}  # ip -> (times, [(latency, ms)])
+        self.steps = {}  # key -> next index when speed is 0
+        self.duration = 0.0
+        base = 0.0
+        for record in read_records(path):
+            if 'header' in record:
+                # Sessions appended to the same file follow each other on the timeline
+                base = self.duration
+                continue
+            t = base + record.get('t', 0.0)
+            self.duration = max(self.duration, t)
+            if 'cmd' in record:
+                times, records = self.commands.setdefault(_key(record['cmd']), ([], []))
+                times.append(t)
+                records.append(record)
+            elif 'reach' in record:
+                for ip, latency in record['reach'].items():
+                    times, results = self.reach.setdefault(ip, ([], []))
+                    times.append(t)
+                    results.append((latency, record.get('ms', 0.0)))
+        self.started = time.monotonic()
+
+    def _pick(self, key, entries):
+        times, items = entries
+        if not self.speed:
+            with self.lock:
+                idx = self.steps.get(key, 0)
+                self.steps[key] = idx + 1
+            return items[idx % len(items)]
+        position = (time.monotonic() - self.started) * self.speed
+        if self.duration:
+            position %= self.duration
+        return items[max(bisect.bisect_right(times, position) - 1, 0)]
+
+    def _wait(self, ms):
+        if self.speed and ms:
+            time.sleep(ms / 1000 / self.speed)
+
+    def run(self, args, **kwargs):
+        entries = self.commands.get(_key(args))
+        if entries is None:
+            # Never recorded: behave like a host that did not answer
+            return subprocess.CompletedProcess(args, 1, "", "")
+        record = self._pick(_key(args), entries)
+        self._wait(record.get('ms', 0.0))
+        if 'exc' in record:
+            raise OSError(record['exc'])
+        return subprocess.CompletedProcess(args, record['rc'], record['out'], record['err'])
+
+    def check(self, ips, ports, timeout):
+        latencies = {}
+        slowest = 0.0
+        for ip in ips:
+            entries = self.reach.get(ip)
+            if entries is None:
+                latencies[ip] = None
+                continue
+            latency, ms = self._pick("reach\0" + ip, entries)
+            latencies[ip] = latency
+            slowest = max(slowest, ms)
+        self._wait(slowest)
+        return latencies
+
+
+def _install(backend):
+    global _backend
+    _backend = backend
+    probes.run_command = backend.run
+    reachability.checker = backend.check
+    return backend
+
+
+def record(path):
+    """ Start capturing every probe command and reachability check to path """
+    atexit.register(stop)
+    return _install(Recorder(path))
+
+
+def replay(path, speed=1.0):
+    """ Answer every probe command and reachability check from a capture file """
+    return _install(Replayer(path, speed))
+
+
+def is_active():
+    return _backend is not None
+
+
+def stop():
+    global _backend
+    if isinstance(_backend, Recorder):
+        _backend.close()
+        probes.run_command = _backend.live_run
+        reachability.checker = _backend.live_check
+    elif _backend is not None:
+        probes.run_command = subprocess.run
+        reachability.checker = reachability.tcp_check
+    _backend = None
+
+
+def summary(path):
+    """ Per-command record counts and mean durations of a capture file """
+    commands = {}
+    for record in read_records(path):
+        if 'cmd' in record:
+            name = record['cmd'][0]
+        elif 'reach' in record:
+            name = 'reachability'
+        else:
+            continue
+        count, total = commands.get(name, (0, 0.0))
+        commands[name] = (count + 1, total + record.get('ms', 0.0))
+    return {name: {'records': count, 'mean_ms': round(total / count, 1)} for name, (count, total) in
+            commands.items()}
+
+
+if __name__ == "__main__":
+    # python capture.py FILE: print what a capture contains
+    print(json.dumps(summary(sys.argv[1]), indent=4))
@@ -0,0 +1,222 @@
+# collector.py
+
+import bisect
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import wait
+
+from probes import poll_host
+
+DEFAULT_THREADS_PER_WORKER = 8
+VIRTUAL_NODES = 64
+SHARD_LOST = "Error: collector process stopped"  # Result of polls that were in flight on a lost shard
+RESPAWN_DELAY = 30  # Seconds before a shard that died is started again a second time
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    """ Consistent hashing of host names onto shards.
+
+    Each shard owns VIRTUAL_NODES points on the ring, so adding or losing a
+    shard only moves the hosts between it and its neighbours.
+    """
+
+    def __init__(self, nodes=(), vnodes=VIRTUAL_NODES):
+        self.vnodes = vnodes
+        self.points = []  # sorted (hash, node)
+        for node in nodes:
+            self.add_node(node)
+
+    def add_node(self, node):
+        for i in range(self.vnodes):
+            bisect.insort(self.points, (_hash(f"{node}#{i}"), node))
+
+    def remove_node(self, node):
+        self.points = [point for point in self.points if point[1] != node]
+
+    def node_for(self, key):
+        if not self.points:
+            return None
+        idx = bisect.bisect(self.points, (_hash(key),))
+        return self.points[idx % len(self.points)][1]
+
+
+def _shard_main(commands, results, threads):
+    """ Entry point of a collector process: poll hosts and stream compact results back """
+    lock = threading.Lock()
+    pool = ThreadPoolExecutor(threads)
+
+    def poll(name, ip, processes, services, reachability, latency, counters):
+        users, running_processes, running_services, counters, latency = poll_host(ip, processes, services,
+                                                                                   reachability, latency, counters)
+        with lock:
+            results.send((name, tuple(users), tuple(running_processes), tuple(running_services), counters,
+                          latency))
+
+    while True:
+        try:
+            message = commands.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        pool.submit(poll, *message)
+    pool.shutdown(wait=True)
+    results.close()
+
+
+class ShardedCollector:
+    """ Polls hosts from a pool of worker processes, sharded by consistent hashing.
+
+    Parsing and probe bookkeeping happen in the workers; the main process only
+    receives one finished (name, users, processes, services, counters, latency) tuple per poll.
+    A shard whose process dies is started again at once, and after that at
+    most every RESPAWN_DELAY seconds; poll() returns False while no shard can
+    take the host, so the caller can poll it another way.
+    """
+
+    def __init__(self, reachability, workers=None, threads=DEFAULT_THREADS_PER_WORKER, counters=True):
+        self.reachability = reachability
+        self.counters = counters
+        self.shards = {}  # shard id -> (process, command connection, result connection)
+        self.pending = {}  # host name -> shard id
+        self.lost = []  # names whose poll was in flight on a dropped shard, reported by the next collect()
+        self.retired = []  # connections of dropped shards, closed by the collect() thread
+        self.lock = threading.Lock()
+        self.send_lock = threading.Lock()  # Held while sending commands and while closing command connections
+        self.threads = threads
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.respawned = {}  # shard id -> monotonic time it was last started again
+        self.closed = False
+        self.ring = HashRing()
+        for shard in range(self.workers):
+            self._spawn(shard)
+
+    def _spawn(self, shard):
+        commands_out, commands_in = multiprocessing.Pipe(duplex=False)
+        results_out, results_in = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=_shard_main, args=(commands_out, results_in, self.threads),
+                                          name=f"collector-{shard}", daemon=True)
+        process.start()
+        commands_out.close()
+        results_in.close()
+        with self.lock:
+            self.shards[shard] = (process, commands_in, results_out)
+            self.ring.add_node(shard)
+
+    def _respawn(self):
+        """ Start dead shards again, the first time at once and then at most every RESPAWN_DELAY seconds """
+        if self.closed or len(self.shards) >= self.workers:
+            return
+        now = time.monotonic()
+        with self.lock:
+            missing = [shard for shard in range(self.workers) if shard not in self.shards and
+                       now - self.respawned.get(shard, float('-inf')) >= RESPAWN_DELAY]
+            for shard in missing:
+                self.respawned[shard] = now
+        for shard in missing:
+            self._spawn(shard)
+
+    def shard_for(self, name):
+        return self.ring.node_for(name)
+
+    def is_pending(self, name):
+        with self.lock:
+            return name in self.pending
+
+    def poll(self, name, ip, processes, services, latency=None):
+        self._respawn()
+        with self.lock:
+            if name in self.pending:
+                return False
+            shard = self.ring.node_for(name)
+            if shard is None:
+                return False
+            self.pending[name] = shard
+            commands = self.shards[shard][1]
+        try:
+            with self.send_lock:
+                commands.send((name, ip, list(processes), list(services), self.reachability, latency,
+                               self.counters))
+        except OSError:
+            self._drop_shard(shard)
+            return False
+        return True
+
+    def collect(self, timeout=None):
+        """ Wait up to timeout for finished polls and return them.
+
+        Only the thread calling collect() closes result connections, so wait()
+        never sees one closed under it. Polls lost with a shard come back as
+        SHARD_LOST errors instead of staying pending forever.
+        """
+        self._close_retired()
+        with self.lock:
+            connections = {shard[2]: shard_id for shard_id, shard in self.shards.items()}
+        finished = []
+        try:
+            ready = wait(list(connections), timeout)
+        except OSError:
+            ready = []
+        for connection in ready:
+            try:
+                while connection.poll():
+                    result = connection.recv()
+                    with self.lock:
+                        self.pending.pop(result[0], None)
+                    finished.append(result)
+            except (EOFError, OSError):
+                self._drop_shard(connections[connection])
+        with self.lock:
+            lost, self.lost = self.lost, []
+        finished.extend((name, (SHARD_LOST,), (), (), None, None) for name in lost)
+        return finished
+
+    def close(self):
+        self.closed = True
+        self._close_retired()
+        with self.lock:
+            shards = list(self.shards.values())
+            self.shards.clear()
+            self.pending.clear()
+        for process, commands, results in shards:
+            try:
+                commands.send(None)
+            except OSError:
+                pass
+            commands.close()
+        for process, commands, results in shards:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+            results.close()
+
+    def _drop_shard(self, shard):
+        # Its hosts move to the neighbouring shards on the ring; their in-flight polls are reported as lost
+        with self.lock:
+            entry = self.shards.pop(shard, None)
+            if entry is None:
+                return
+            self.ring.remove_node(shard)
+            self.lost.extend(name for name, owner in self.pending.items() if owner == shard)
+            self.pending = {name: owner for name, owner in self.pending.items() if owner != shard}
+            self.retired.append(entry)
+        process = entry[0]
+        if process.is_alive():
+            process.terminate()
+        self._respawn()
+
+    def _close_retired(self):
+        with self.lock:
+            retired, self.retired = self.retired, []
+        for process, commands, results in retired:
+            with self.send_lock:
+                commands.close()
+            results.close()
@@ -0,0 +1,319 @@
+# dialogs.py
+""" Dialogs opened on demand; imported lazily so they stay off the startup path """
+
+from datetime import datetime
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QListWidget, QLineEdit, QPushButton,
+                             QComboBox, QDialogButtonBox, QTabWidget, QTableWidget, QTableWidgetItem, QFileDialog)
+from PyQt5.QtGui import QColor
+from PyQt5.QtCore import Qt
+
+from translations import _
+
+
+class LanguageDialog(QDialog):
+    LANGUAGES = (("English", 'en'), ("Português", 'pt'))
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(_("Select Language"))
+        layout = QVBoxLayout(self)
+
+        self.language_combo = QComboBox()
+        self.language_combo.addItems([label for label, code in self.LANGUAGES])
+        layout.addWidget(self.language_combo)
+
+        ok_button = QPushButton(_("OK"))
+        ok_button.clicked.connect(self.accept)
+        layout.addWidget(ok_button)
+
+    def get_language(self):
+        return self.LANGUAGES[self.language_combo.currentIndex()][1]
+
+
+class UsageReportDialog(QDialog):
+    DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+    def __init__(self, report, parent=None):
+        import analytics
+        super().__init__(parent)
+        self.setWindowTitle(_("Usage Report"))
+        self.resize(800, 500)
+        self.report = report
+        self.layout = QVBoxLayout(self)
+
+        usage = {analytics.OVER: _("Over-used"), analytics.UNDER: _("Under-used"), '': ""}
+        self.tables = [
+            ('hosts', _("Servers"), [_("Server"), _("Samples"), _("Peak"), _("P95"), _("Mean"), _("Busiest hour"),
+                                     _("Mean session (min)"), _("Usage")],
+             [[row['host'], row['samples'], row['peak'], row['p95'], row['mean'],
+               self.hour_label(row['busiest_hour']), row['mean_dwell'], usage[row['usage']]]
+              for row in report['hosts']]),
+            ('hour_of_week', _("Hour of week"), [_("Hour"), _("Samples"), _("Peak"), _("P95"), _("Mean")],
+             [[self.hour_label(row['day'] * 24 + row['hour']), row['samples'], row['peak'], row['p95'], row['mean']]
+              for row in report['hour_of_week']]),
+            ('users', _("Users"), [_("User"), _("Sessions"), _("Total hours"), _("Median session (min)")],
+             [[row['user'], row['sessions'], row['total_hours'], row['median_minutes']] for row in report['users']]),
+        ]
+
+        self.tabs = QTabWidget()
+        for key, title, headers, rows in self.tables:
+            table = QTableWidget(len(rows), len(headers))
+            table.setHorizontalHeaderLabels(headers)
+            table.setEditTriggers(QTableWidget.NoEditTriggers)
+            for row_idx, row in enumerate(rows):
+                for col_idx, value in enumerate(row):
+                    item = QTableWidgetItem()
+                    item.setData(Qt.DisplayRole, "" if value is None else value)
+                    table.setItem(row_idx, col_idx, item)
+            # Keep the report's order until a column header is clicked
+            table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+            table.setSortingEnabled(True)
+            table.resizeColumnsToContents()
+            self.tabs.addTab(table, title)
+        self.layout.addWidget(self.tabs)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        export_button = buttons.addButton(_("Export CSV"), QDialogButtonBox.ActionRole)
+        export_button.clicked.connect(self.export_csv)
+        buttons.rejected.connect(self.reject)
+        self.layout.addWidget(buttons)
+
+    def hour_label(self, hour_of_week):
+        return f"{_(self.DAYS[hour_of_week // 24])} {hour_of_week % 24:02d}:00"
+
+    def export_csv(self):
+        key = self.tables[self.tabs.currentIndex()][0]
+        path, _filter = QFileDialog.getSaveFileName(self, _("Export CSV"), f"usage_{key}.csv", "CSV (*.csv)")
+        if path:
+            import analytics
+            analytics.write_csv(self.report[key], path)
+
+
+class TIConfigDialog(QDialog):
+    def __init__(self, ti_users, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(_("Configure IT Users"))
+        self.layout = QVBoxLayout(self)
+
+        self.ti_users_list = QListWidget()
+        self.ti_users_list.addItems(ti_users)
+        self.layout.addWidget(self.ti_users_list)
+
+        self.new_user_input = QLineEdit()
+        self.layout.addWidget(self.new_user_input)
+
+        add_button = QPushButton(_("Add User"))
+        add_button.clicked.connect(self.add_user)
+        self.layout.addWidget(add_button)
+
+        remove_button = QPushButton(_("Remove Selected User"))
+        remove_button.clicked.connect(self.remove_user)
+        self.layout.addWidget(remove_button)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        self.layout.addWidget(buttons)
+
+    def add_user(self):
+        user = self.new_user_input.text().strip()
+        if user:
+            self.ti_users_list.addItem(user)
+            self.new_user_input.clear()
+
+    def remove_user(self):
+        current_item = self.ti_users_list.currentItem()
+        if current_item:
+            self.ti_users_list.takeItem(self.ti_users_list.row(current_item))
+
+    def get_ti_users(self):
+        return [self.ti_users_list.item(i).text() for i in range(self.ti_users_list.count())]
+
+
+class AddServerDialog(QDialog):
+    def __init__(self, groups=(), parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(_("Add Server"))
+        self.layout = QFormLayout(self)
+
+        self.name_input = QLineEdit()
+        self.ip_input = QLineEdit()
+        # Pick an existing group or type a new one; empty leaves the server ungrouped
+        self.group_input = QComboBox()
+        self.group_input.setEditable(True)
+        self.group_input.addItems([""] + list(groups))
+
+        self.layout.addRow(_("Server Name:"), self.name_input)
+        self.layout.addRow(_("Server IP:"), self.ip_input)
+        self.layout.addRow(_("Group:"), self.group_input)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        self.layout.addWidget(buttons)
+
+    def get_server_info(self):
+        return self.name_input.text().strip(), self.ip_input.text().strip(), self.group_input.currentText().strip()
+
+
+class MonitorProcessesDialog(QDialog):
+    def __init__(self, processes, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(_("Monitor Processes"))
+        self.layout = QVBoxLayout(self)
+
+        self.processes_list = QListWidget()
+        self.processes_list.addItems(processes)
+        self.layout.addWidget(self.processes_list)
+
+        self.new_process_input = QLineEdit()
+        self.layout.addWidget(self.new_process_input)
+
+        add_button = QPushButton(_("Add Process"))
+        add_button.clicked.connect(self.add_process)
+        self.layout.addWidget(add_button)
+
+        remove_button = QPushButton(_("Remove Selected Process"))
+        remove_button.clicked.connect(self.remove_process)
+        self.layout.addWidget(remove_button)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        self.layout.addWidget(buttons)
+
+    def add_process(self):
+        process = self.new_process_input.text().strip()
+        if process:
+            self.processes_list.addItem(process)
+            self.new_process_input.clear()
+
+    def remove_process(self):
+        current_item = self.processes_list.currentItem()
+        if current_item:
+            self.processes_list.takeItem(self.processes_list.row(current_item))
+
+    def get_processes(self):
+        return [self.processes_list.item(i).text() for i in range(self.processes_list.count())]
+
+
+class MonitorServicesDialog(QDialog):
+    def __init__(self, services, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(_("Monitor Services"))
+        self.layout = QVBoxLayout(self)
+
+        self.services_list = QListWidget()
+        self.services_list.addItems(services)
+        self.layout.addWidget(self.services_list)
+
+        self.new_service_input = QLineEdit()
+        self.layout.addWidget(self.new_service_input)
+
+        add_button = QPushButton(_("Add Service"))
+        add_button.clicked.connect(self.add_service)
+        self.layout.addWidget(add_button)
+
+        remove_button = QPushButton(_("Remove Selected Service"))
+        remove_button.clicked.connect(self.remove_service)
+        self.layout.addWidget(remove_button)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        self.layout.addWidget(buttons)
+
+    def add_service(self):
+        service = self.new_service_input.text().strip()
+        if service:
+            self.services_list.addItem(service)
+            self.new_service_input.clear()
+
+    def remove_service(self):
+        current_item = self.services_list.currentItem()
+        if current_item:
+            self.services_list.takeItem(self.services_list.row(current_item))
+
+    def get_services(self):
+        return [self.services_list.item(i).text() for i in range(self.services_list.count())]
+
+
+class EventPanel(QDialog):
+    """ Live view of the event log's in-memory ring, newest first """
+
+    def __init__(self, event_log, parent=None):
+        import events
+        super().__init__(parent)
+        self.kind_labels = {
+            events.LOGON: "Logon", events.LOGOFF: "Logoff", events.SERVICE_STARTED: "Service started",
+            events.SERVICE_STOPPED: "Service stopped", events.PROCESS_STARTED: "Process started",
+            events.PROCESS_STOPPED: "Process stopped", events.PROBE_ERROR: "Probe error",
+            events.TIMEOUT: "Timeout", events.RECOVERED: "Recovered", events.SLOW_POLL: "Slow poll"}
+        self.level_colors = {events.WARNING: QColor("#FFF3CD"), events.ERROR_LEVEL: QColor("#F8D7DA")}
+        self.setWindowTitle(_("Event Log"))
+        self.resize(900, 500)
+        self.event_log = event_log
+        self.layout = QVBoxLayout(self)
+
+        filter_layout = QHBoxLayout()
+        self.kind_filter = QComboBox()
+        self.kind_filter.addItem(_("All events"), None)
+        for kind in events.KINDS:
+            self.kind_filter.addItem(_(self.kind_labels[kind]), kind)
+        self.kind_filter.currentIndexChanged.connect(self.reload)
+        filter_layout.addWidget(self.kind_filter)
+        self.text_filter = QLineEdit()
+        self.text_filter.setPlaceholderText(_("Filter by server, user, service or message..."))
+        self.text_filter.textChanged.connect(self.reload)
+        filter_layout.addWidget(self.text_filter)
+        self.layout.addLayout(filter_layout)
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels([_("Time"), _("Event"), _("Server"), _("Subject"), _("Details")])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.layout.addWidget(self.table)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        buttons.rejected.connect(self.reject)
+        self.layout.addWidget(buttons)
+
+        self.event_log.subscribe(self.add_event)
+        self.destroyed.connect(lambda: self.event_log.unsubscribe(self.add_event))
+
+    def filters(self):
+        kind = self.kind_filter.currentData()
+        return {kind} if kind else None, self.text_filter.text().strip()
+
+    def showEvent(self, event):
+        # Events that arrived while the panel was hidden were not added; rebuild from the ring
+        if not event.spontaneous():
+            self.reload()
+        super().showEvent(event)
+
+    def reload(self):
+        matching = self.event_log.recent(*self.filters())
+        self.table.setRowCount(0)
+        for event in matching:
+            self.insert_row(event)
+        self.table.resizeColumnsToContents()
+
+    def add_event(self, event):
+        # Called on the GUI thread, which is where ServerMonitor emits events
+        import events
+        if self.isVisible() and events.matches(event, *self.filters()):
+            self.insert_row(event)
+            if self.table.rowCount() > self.event_log.ring.maxlen:
+                self.table.removeRow(self.table.rowCount() - 1)
+
+    def insert_row(self, event):
+        self.table.insertRow(0)
+        values = (datetime.fromtimestamp(event.time).strftime('%Y-%m-%d %H:%M:%S'),
+                  _(self.kind_labels.get(event.kind, event.kind)), event.host, event.subject or "",
+                  event.message or "")
+        color = self.level_colors.get(event.level)
+        for col, value in enumerate(values):
+            item = QTableWidgetItem(value)
+            if color is not None:
+                item.setBackground(color)
+            self.table.setItem(0, col, item)
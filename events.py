@@ -0,0 +1,190 @@
+# events.py
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from host_state import ONLINE, OFFLINE, ERROR
+
+# Event kinds
+LOGON = 'logon'
+LOGOFF = 'logoff'
+SERVICE_STARTED = 'service_started'
+SERVICE_STOPPED = 'service_stopped'
+PROCESS_STARTED = 'process_started'
+PROCESS_STOPPED = 'process_stopped'
+PROBE_ERROR = 'probe_error'
+TIMEOUT = 'timeout'
+RECOVERED = 'recovered'
+SLOW_POLL = 'slow_poll'
+
+KINDS = (LOGON, LOGOFF, SERVICE_STARTED, SERVICE_STOPPED, PROCESS_STARTED, PROCESS_STOPPED, PROBE_ERROR, TIMEOUT,
+         RECOVERED, SLOW_POLL)
+
+INFO = 'info'
+WARNING = 'warning'
+ERROR_LEVEL = 'error'
+LEVELS = {SERVICE_STOPPED: WARNING, PROCESS_STOPPED: WARNING, SLOW_POLL: WARNING, TIMEOUT: WARNING,
+          PROBE_ERROR: ERROR_LEVEL}
+
+LOG_FILE = 'events.jsonl'
+MAX_QUEUED = 10000  # Events waiting for the writer; beyond this they are dropped rather than block
+
+
+class Event:
+    __slots__ = ('time', 'kind', 'host', 'subject', 'message')
+
+    def __init__(self, kind, host, subject=None, message=None, when=None):
+        self.time = time.time() if when is None else when
+        self.kind = kind
+        self.host = host
+        self.subject = subject
+        self.message = message
+
+    @property
+    def level(self):
+        return LEVELS.get(self.kind, INFO)
+
+    def to_dict(self):
+        return {'time': datetime.fromtimestamp(self.time).isoformat(timespec='milliseconds'), 'kind': self.kind,
+                'level': self.level, 'host': self.host, 'subject': self.subject, 'message': self.message}
+
+
+def snapshot(host):
+    """ The parts of a HostState that poll_events compares; take it before apply_result """
+    return host.status, host.message, host.users, host.running_processes, host.running_services, host.polled_at
+
+
+def poll_events(name, before, host, duration=None, slow_after=None):
+    """ Events implied by a new poll result, given the host's snapshot() from before it.
+
+    Logons, logoffs and state changes are only reported between two online
+    polls, so start-up and recovery do not flood the log.
+    """
+    status, message, users, running_processes, running_services, polled_at = before
+    events = []
+    if host.status == ERROR and (status != ERROR or host.message != message):
+        events.append(Event(PROBE_ERROR, name, message=host.message))
+    elif host.status == OFFLINE and status != OFFLINE:
+        events.append(Event(TIMEOUT, name, message=host.message))
+    elif host.status == ONLINE and status in (OFFLINE, ERROR):
+        events.append(Event(RECOVERED, name))
+
+    if host.status == ONLINE and status == ONLINE and polled_at:
+        for user in sorted(set(host.users) - set(users)):
+            events.append(Event(LOGON, name, user))
+        for user in sorted(set(users) - set(host.users)):
+            events.append(Event(LOGOFF, name, user))
+        for watched, old, new, started, stopped in (
+                (host.services, running_services, host.running_services, SERVICE_STARTED, SERVICE_STOPPED),
+                (host.processes, running_processes, host.running_processes, PROCESS_STARTED, PROCESS_STOPPED)):
+            for item in watched:
+                if item in new and item not in old:
+                    events.append(Event(started, name, item))
+                elif item in old and item not in new:
+                    events.append(Event(stopped, name, item))
+
+    if duration is not None and slow_after and duration >= slow_after:
+        events.append(Event(SLOW_POLL, name, message=f"{duration:.1f} s"))
+    return events
+
+
+def matches(event, kinds=None, text=None):
+    """ Filter for event views: kinds is a set of kinds, text a case-insensitive host/subject/message substring """
+    if kinds is not None and event.kind not in kinds:
+        return False
+    text = text.casefold() if text else None
+    return text is None or any(text in value.casefold() for value in (event.host, event.subject, event.message)
+                               if value)
+
+
+class EventLog:
+    """ Fixed-size in-memory ring of recent events plus a rotating JSON lines file.
+
+    emit() only appends to a deque and a bounded queue, so it never blocks the
+    caller; a background thread writes queued events in batches every
+    flush_interval seconds and rotates the file once it reaches max_bytes, keeping
+    `backups` older files (events.1.jsonl is the most recent).
+    """
+
+    def __init__(self, path, capacity=2000, max_bytes=5000000, backups=5, flush_interval=2.0):
+        self.path = path
+        self.ring = deque(maxlen=capacity)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=MAX_QUEUED)
+        self.listeners = []
+        self.dropped = 0
+        self.stopping = threading.Event()
+        os.makedirs(path, exist_ok=True)
+        self.thread = threading.Thread(target=self.run, name='event-writer', daemon=True)
+        self.thread.start()
+
+    def subscribe(self, callback):
+        """ callback(event) runs in the thread that emits the event """
+        self.listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def emit(self, event):
+        self.ring.append(event)
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+        for callback in list(self.listeners):
+            try:
+                callback(event)
+            except Exception:
+                pass
+
+    def recent(self, kinds=None, text=None):
+        """ Events in the ring, oldest first, filtered as in matches() """
+        return [event for event in list(self.ring) if matches(event, kinds, text)]
+
+    def close(self, timeout=2.0):
+        self.stopping.set()
+        self.thread.join(timeout)
+
+    def run(self):
+        while True:
+            stopping = self.stopping.wait(self.flush_interval)
+            batch = []
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            if stopping:
+                break
+
+    def _write(self, batch):
+        lines = "".join(json.dumps(event.to_dict()) + "\n" for event in batch)
+        path = os.path.join(self.path, LOG_FILE)
+        try:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                size = f.tell()
+            if size >= self.max_bytes:
+                self._rotate(path)
+        except OSError:
+            self.dropped += len(batch)
+
+    def _rotate(self, path):
+        root, ext = os.path.splitext(path)
+        for idx in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{root}.{idx}{ext}"):
+                os.replace(f"{root}.{idx}{ext}", f"{root}.{idx + 1}{ext}")
+        if self.backups:
+            os.replace(path, f"{root}.1{ext}")
+        else:
+            os.remove(path)
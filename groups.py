@@ -0,0 +1,80 @@
+# groups.py
+
+from host_state import ONLINE, OFFLINE, ERROR
+
+UNGROUPED = ''
+
+# Seconds between polls of an expanded group, by priority
+PRIORITY_INTERVALS = {'critical': 15, 'normal': 60, 'low': 300}
+DEFAULT_PRIORITY = 'normal'
+DEFAULT_COLLAPSED_INTERVAL = 300  # Seconds between polls of a collapsed group
+
+
+class Group:
+    """ Polling and display settings of a named set of servers.
+
+    Expanded groups are polled every `interval` seconds (by default the
+    interval of their priority) and show a card per server. Collapsed groups
+    are polled every `collapsed_interval` seconds, or `interval` if that is
+    longer, and only show a summary row. Low-priority groups start collapsed.
+    """
+
+    __slots__ = ('name', 'priority', 'interval', 'collapsed_interval', 'collapsed')
+
+    def __init__(self, name, priority=DEFAULT_PRIORITY, interval=None, collapsed_interval=DEFAULT_COLLAPSED_INTERVAL,
+                 collapsed=None):
+        self.name = name
+        self.priority = priority if priority in PRIORITY_INTERVALS else DEFAULT_PRIORITY
+        self.interval = interval  # None follows the priority
+        self.collapsed_interval = collapsed_interval
+        self.collapsed = self.priority == 'low' if collapsed is None else collapsed
+
+    @classmethod
+    def from_config(cls, name, spec):
+        return cls(name, spec.get('priority', DEFAULT_PRIORITY), spec.get('interval'),
+                   spec.get('collapsed_interval', DEFAULT_COLLAPSED_INTERVAL), spec.get('collapsed'))
+
+    def to_config(self):
+        config = {'priority': self.priority, 'collapsed_interval': self.collapsed_interval, 'collapsed': self.collapsed}
+        if self.interval:
+            config['interval'] = self.interval
+        return config
+
+    def is_customized(self):
+        """ Whether any setting differs from those of a group created just because a server named it """
+        return self.to_config() != Group(self.name).to_config()
+
+    def poll_interval(self):
+        """ Seconds between polls in the group's current state """
+        interval = self.interval or PRIORITY_INTERVALS[self.priority]
+        return max(interval, self.collapsed_interval) if self.collapsed else interval
+
+
+def build_groups(specs, fleet):
+    """ Configured groups in config order, then groups only named by servers, then ungrouped servers.
+
+    A configured group with no servers is dropped unless its settings were changed from the defaults.
+    """
+    named = {host.group for host in fleet}
+    groups = {}
+    for name, spec in specs.items():
+        group = Group.from_config(name, spec)
+        if name != UNGROUPED and (name in named or group.is_customized()):
+            groups[name] = group
+    for host in fleet:
+        if host.group not in groups and host.group != UNGROUPED:
+            groups[host.group] = Group(host.group)
+    if any(host.group == UNGROUPED for host in fleet) or not groups:
+        groups[UNGROUPED] = Group.from_config(UNGROUPED, specs.get(UNGROUPED, {}))
+    return groups
+
+
+def summarize(hosts):
+    """ Counts shown in a group's summary row """
+    summary = {'servers': 0, ONLINE: 0, OFFLINE: 0, ERROR: 0, 'sessions': 0}
+    for host in hosts:
+        summary['servers'] += 1
+        if host.status in summary:
+            summary[host.status] += 1
+        summary['sessions'] += len(host.users)
+    return summary
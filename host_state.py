@@ -0,0 +1,164 @@
+# host_state.py
+
+import sys
+import time
+from collections import deque
+
+from probes import NO_RESPONSE, UNREACHABLE
+
+# Host status after a poll
+UNKNOWN = 'unknown'
+ONLINE = 'online'
+OFFLINE = 'unreachable'
+ERROR = 'error'
+
+# Where the latest result came from
+POLL = 'poll'
+AGENT = 'agent'
+
+intern = sys.intern
+
+
+def classify(users):
+    """ Classify raw poll users as ONLINE, OFFLINE or ERROR """
+    if users and users[0].startswith("Error:"):
+        return ERROR
+    if users and users[0] in (NO_RESPONSE, UNREACHABLE):
+        return OFFLINE
+    return ONLINE
+
+
+def _names(values):
+    return tuple(intern(value) for value in values)
+
+
+class HostState:
+    """ Config and latest results of one monitored server.
+
+    Strings are interned and collections are tuples/frozensets, so thousands of
+    hosts stay small and the UI, search, alerts and exports all read from here
+    instead of from widget contents.
+    """
+
+    __slots__ = ('name', 'ip', 'group', 'processes', 'services', 'status', 'message', 'users', 'running_processes',
+                 'running_services', 'latency', 'counters', 'source', 'polled_at', 'updated_at')
+
+    def __init__(self, name, ip, processes=(), services=(), group=''):
+        self.name = intern(name)
+        self.ip = intern(ip)
+        self.group = intern(group or '')
+        self.processes = _names(processes)
+        self.services = _names(services)
+        self.status = UNKNOWN
+        self.message = None
+        self.users = ()
+        self.running_processes = frozenset()
+        self.running_services = frozenset()
+        self.latency = None
+        self.counters = None  # deque of counter samples, created on the first sample
+        self.source = POLL
+        self.polled_at = 0.0  # time.monotonic() of the latest result, 0 if never polled
+        self.updated_at = None  # time.time() of the latest result
+
+    @classmethod
+    def from_config(cls, server):
+        return cls(server['name'], server['ip'], server.get('processes', []), server.get('services', []),
+                   server.get('group', ''))
+
+    def to_config(self):
+        config = {'name': self.name, 'ip': self.ip, 'processes': list(self.processes), 'services': list(self.services)}
+        if self.group:
+            config['group'] = self.group
+        return config
+
+    def set_processes(self, processes):
+        self.processes = _names(processes)
+
+    def set_services(self, services):
+        self.services = _names(services)
+
+    def apply_result(self, users, running_processes, running_services, counters=None, latency=None,
+                     history=60, source=POLL):
+        self.status = classify(users)
+        if self.status == ONLINE:
+            self.users = _names(users)
+            self.message = None
+        else:
+            self.users = ()
+            self.message = users[0]
+        self.running_processes = frozenset(_names(running_processes))
+        self.running_services = frozenset(_names(running_services))
+        self.latency = latency
+        self.source = source
+        if counters is not None:
+            if self.counters is None or self.counters.maxlen != history:
+                self.counters = deque(self.counters or (), maxlen=history)
+            self.counters.append(counters)
+        self.polled_at = time.monotonic()
+        self.updated_at = time.time()
+
+    def age(self, now=None):
+        """ Seconds since the latest result, or None if never polled """
+        if not self.polled_at:
+            return None
+        return (time.monotonic() if now is None else now) - self.polled_at
+
+    def is_running(self, item):
+        return item in self.running_processes or item in self.running_services
+
+
+class Fleet:
+    """ Ordered collection of HostState records, keyed by server name """
+
+    __slots__ = ('hosts',)
+
+    def __init__(self, hosts=()):
+        self.hosts = {}
+        for host in hosts:
+            # The first of several servers with the same name wins
+            self.hosts.setdefault(host.name, host)
+
+    @classmethod
+    def from_config(cls, servers):
+        # Entries in an unexpected format are skipped
+        return cls(HostState.from_config(server) for server in servers if isinstance(server, dict))
+
+    def to_config(self):
+        return [host.to_config() for host in self]
+
+    def add(self, host):
+        if host.name in self.hosts:
+            raise ValueError(f"duplicate server name {host.name!r}")
+        self.hosts[host.name] = host
+        return host
+
+    def remove(self, name):
+        return self.hosts.pop(name, None)
+
+    def get(self, name):
+        return self.hosts.get(name)
+
+    def names(self):
+        return list(self.hosts)
+
+    def __getitem__(self, name):
+        return self.hosts[name]
+
+    def __contains__(self, name):
+        return name in self.hosts
+
+    def __iter__(self):
+        return iter(self.hosts.values())
+
+    def __len__(self):
+        return len(self.hosts)
+
+    def by_group(self):
+        """ {group: [hosts]} in fleet order """
+        groups = {}
+        for host in self:
+            groups.setdefault(host.group, []).append(host)
+        return groups
+
+    def find_by_ip(self, ip):
+        return next((host for host in self if host.ip == ip), None)
@@ -0,0 +1,125 @@
+# probes.py
+
+import csv
+import subprocess
+
+from reachability import check_host
+
+NO_RESPONSE = "No server response."
+UNREACHABLE = "Host unreachable."
+
+# Keys of the dict returned by check_counters
+CPU = 'cpu'
+MEMORY = 'memory_mb'
+DISK_QUEUE = 'disk_queue'
+WORKING_SET = 'working_set'
+
+COUNTER_PATHS = {
+    CPU: r"\Processor(_Total)\% Processor Time",
+    MEMORY: r"\Memory\Available MBytes",
+    DISK_QUEUE: r"\PhysicalDisk(_Total)\Current Disk Queue Length",
+}
+
+# Only defined on Windows; keeps the probes importable elsewhere
+CREATE_NO_WINDOW = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
+# Every probe command goes through here; capture.py swaps it to record or replay raw output
+run_command = subprocess.run
+
+
+def query_sessions(ip):
+    if ip == "10.12.82.2":  # Special handling for Windows Server 2012 R2
+        result = run_command(["qwinsta", "/server:" + ip], capture_output=True, text=True,
+                             encoding='utf-16-le', creationflags=CREATE_NO_WINDOW)
+    else:
+        result = run_command(["qwinsta", "/server:" + ip], capture_output=True, text=True,
+                             creationflags=CREATE_NO_WINDOW)
+
+    if result.stdout:  # Check if there's any output
+        return [line.split()[1] for line in result.stdout.splitlines()[1:] if "rdp-tcp#" in line.lower()]
+    return [NO_RESPONSE]
+
+
+def check_processes(ip, processes):
+    running_processes = []
+    for process in processes:
+        try:
+            result = run_command(["tasklist", "/S", ip, "/NH", "/FI", f"IMAGENAME eq {process}"],
+                                 capture_output=True, text=True, creationflags=CREATE_NO_WINDOW)
+            if process.lower() in result.stdout.lower():
+                running_processes.append(process)
+        except Exception:
+            pass
+    return running_processes
+
+
+def check_services(ip, services):
+    running_services = []
+    for service in services:
+        try:
+            result = run_command(["sc", "\\\\" + ip, "query", service], capture_output=True, text=True,
+                                 creationflags=CREATE_NO_WINDOW)
+            if "RUNNING" in result.stdout:
+                running_services.append(service)
+        except Exception:
+            pass
+    return running_services
+
+
+def _instance(process):
+    # Performance counter instances drop the extension: notepad.exe -> Process(notepad)
+    return process[:-4] if process.lower().endswith('.exe') else process
+
+
+def check_counters(ip, processes):
+    """ Sample the fixed counter set and per-process working sets in a single typeperf call """
+    paths = list(COUNTER_PATHS.values()) + [rf"\Process({_instance(process)})\Working Set" for process in processes]
+    try:
+        result = run_command(["typeperf", "-s", ip, "-sc", "1"] + paths, capture_output=True, text=True,
+                             creationflags=CREATE_NO_WINDOW)
+    except Exception:
+        return None
+    return parse_counters(result.stdout, processes)
+
+
+def parse_counters(output, processes):
+    rows = [row for row in csv.reader(output.splitlines()) if row]
+    header = next((idx for idx, row in enumerate(rows) if row[0].startswith("(PDH-CSV")), None)
+    if header is None or header + 1 >= len(rows):
+        return None
+    columns, values = rows[header][1:], rows[header + 1][1:]
+
+    def value(path):
+        # typeperf prefixes each column with \\host, so match on the counter path
+        for column, raw in zip(columns, values):
+            if column.lower().endswith(path.lower()):
+                try:
+                    return float(raw)
+                except ValueError:
+                    return None
+        return None
+
+    counters = {key: value(path) for key, path in COUNTER_PATHS.items()}
+    counters[WORKING_SET] = {process: value(rf"\Process({_instance(process)})\Working Set")
+                             for process in processes}
+    return counters
+
+
+def poll_host(ip, processes, services, reachability, latency=None, counters=True):
+    """ Run the full probe pipeline for one host.
+
+    Returns (users, running_processes, running_services, counters, latency). A
+    latency passed in means a fleet-wide reachability check already reached the host.
+    """
+    try:
+        if latency is None and reachability['enabled']:
+            latency = check_host(ip, reachability['ports'], reachability['timeout'])
+            if latency is None:
+                return [UNREACHABLE], [], [], None, None
+
+        users = query_sessions(ip)
+        return (users, check_processes(ip, processes), check_services(ip, services),
+                check_counters(ip, processes) if counters else None, latency)
+
+    except Exception as e:
+        return [f"Error: {str(e)}"], [], [], None, latency
@@ -0,0 +1,70 @@
+# reachability.py
+
+import time
+
+# asyncio is imported inside the functions that use it: it is slow to import and the first
+# check runs on a worker thread, after the window is up
+
+# RPC endpoint mapper, SMB and RDP: qwinsta, tasklist and sc all need one of these
+DEFAULT_PORTS = (135, 445, 3389)
+DEFAULT_TIMEOUT = 0.8  # Seconds per connection attempt
+MAX_CONCURRENT_HOSTS = 256
+
+
+async def _connect(ip, port, timeout):
+    import asyncio
+    start = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    latency = (time.perf_counter() - start) * 1000
+    writer.close()
+    return latency
+
+
+async def _probe_host(ip, ports, timeout, semaphore):
+    import asyncio
+    async with semaphore:
+        attempts = [asyncio.ensure_future(_connect(ip, port, timeout)) for port in ports]
+        try:
+            # The first port that accepts a connection is enough
+            for attempt in asyncio.as_completed(attempts):
+                latency = await attempt
+                if latency is not None:
+                    return latency
+            return None
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+
+async def _probe_hosts(ips, ports, timeout):
+    import asyncio
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_HOSTS)
+    latencies = await asyncio.gather(*(_probe_host(ip, ports, timeout, semaphore) for ip in ips))
+    return dict(zip(ips, latencies))
+
+
+def tcp_check(ips, ports, timeout):
+    import asyncio
+    return asyncio.run(_probe_hosts(ips, tuple(ports), timeout))
+
+
+# capture.py swaps this to record or replay reachability results
+checker = tcp_check
+
+
+def check_hosts(ips, ports=DEFAULT_PORTS, timeout=DEFAULT_TIMEOUT):
+    """ Non-blocking TCP connect to every host at once.
+
+    Returns {ip: latency in ms, or None if no port answered within the timeout}.
+    """
+    ips = list(dict.fromkeys(ips))
+    if not ips:
+        return {}
+    return checker(ips, ports, timeout)
+
+
+def check_host(ip, ports=DEFAULT_PORTS, timeout=DEFAULT_TIMEOUT):
+    return check_hosts([ip], ports, timeout)[ip]
@@ -0,0 +1,166 @@
+# search_index.py
+
+import bisect
+import re
+
+# Field names a host can be matched on
+NAME = 'name'
+IP = 'ip'
+USER = 'user'
+PROCESS = 'process'
+SERVICE = 'service'
+STATE = 'state'
+
+_WORD_SPLIT = re.compile(r"[\s_\-\\/]+")
+SHORT_PREFIX = 4  # Host sets of prefixes up to this length are kept, so broad queries need no term scan
+
+
+def value_terms(value):
+    """ Lowercased full value plus its words, so 'AD Cloud' matches 'cloud' """
+    value = value.strip().lower()
+    if not value:
+        return set()
+    terms = {value}
+    terms.update(word for word in _WORD_SPLIT.split(value) if word)
+    return terms
+
+
+class FleetIndex:
+    """ Inverted index from names, IPs, users, processes, services and states to hosts.
+
+    Updated incrementally per host and field, queried by prefix through a sorted
+    term list, so lookups do not depend on walking every server widget.
+    """
+
+    def __init__(self):
+        self.postings = {}     # term -> {host: set(fields)}
+        self.host_fields = {}  # host -> {field: set(terms)}
+        self.sorted_terms = []
+        self.short_prefixes = {}  # prefix of up to SHORT_PREFIX chars -> {host: number of its terms with it}
+
+    def __len__(self):
+        return len(self.host_fields)
+
+    def set_field(self, host, field, values):
+        new_terms = set()
+        for value in values:
+            new_terms |= value_terms(value)
+        fields = self.host_fields.setdefault(host, {})
+        old_terms = fields.get(field, set())
+        if new_terms == old_terms:
+            return
+
+        for term in old_terms - new_terms:
+            self._unlink(term, host, field)
+        for term in new_terms - old_terms:
+            self._link(term, host, field)
+        fields[field] = new_terms
+
+    def update_host(self, host, **fields):
+        for field, values in fields.items():
+            self.set_field(host, field, values)
+
+    def remove_host(self, host):
+        for field, terms in self.host_fields.pop(host, {}).items():
+            for term in terms:
+                self._unlink(term, host, field)
+
+    def search(self, text):
+        """ Prefix search; every word of the query must match somewhere on a host.
+
+        Returns the set of matching hosts, or None for an empty query. Which
+        terms matched is only worked out per host, by matched_terms(), for the
+        cards actually shown.
+        """
+        prefixes = self._query_prefixes(text)
+        if not prefixes:
+            return None
+        # Most selective word first so the rest only filter a small candidate set
+        ranges = sorted(((prefix, *self._prefix_range(prefix)) for prefix in prefixes), key=self._weight)
+        results = None
+        for prefix, lo, hi in ranges:
+            if results is None and len(prefix) <= SHORT_PREFIX:
+                results = set(self.short_prefixes.get(prefix, ()))
+            elif results is None:
+                results = set()
+                for term in self.sorted_terms[lo:hi]:
+                    results.update(self.postings[term])
+                    if len(results) == len(self.host_fields):
+                        break  # Every host already matches
+            elif len(results) < hi - lo:
+                # Fewer candidates than terms: check each candidate's own terms
+                results = {host for host in results if self._has_prefix(host, prefix)}
+            else:
+                matched = set()
+                for term in self.sorted_terms[lo:hi]:
+                    matched.update(self.postings[term])
+                results &= matched
+            if not results:
+                break
+        return results
+
+    def matched_terms(self, host, text):
+        """ {(field, term), ...} of a host that matched the query, for highlighting """
+        prefixes = self._query_prefixes(text)
+        hits = set()
+        for field, terms in self.host_fields.get(host, {}).items():
+            for term in terms:
+                if any(term.startswith(prefix) for prefix in prefixes):
+                    hits.add((field, term))
+        return hits
+
+    def _query_prefixes(self, text):
+        text = text.strip().lower()
+        if not text:
+            return []
+        # The whole query as one term ('srv-01', 'ad cloud') before falling back to words
+        lo, hi = self._prefix_range(text)
+        if lo != hi:
+            return [text]
+        return [word for word in _WORD_SPLIT.split(text) if word]
+
+    def _has_prefix(self, host, prefix):
+        return any(term.startswith(prefix) for terms in self.host_fields[host].values() for term in terms)
+
+    def _weight(self, term_range):
+        prefix, lo, hi = term_range
+        if len(prefix) <= SHORT_PREFIX:
+            return len(self.short_prefixes.get(prefix, ()))
+        # Posting sizes of the first few terms are a cheap estimate of how many hosts match
+        return sum(len(self.postings[term]) for term in self.sorted_terms[lo:min(hi, lo + 16)]) + (hi - lo)
+
+    def _prefix_range(self, prefix):
+        lo = bisect.bisect_left(self.sorted_terms, prefix)
+        return lo, bisect.bisect_left(self.sorted_terms, prefix + '\uffff', lo)
+
+    def _link(self, term, host, field):
+        hosts = self.postings.get(term)
+        if hosts is None:
+            hosts = self.postings[term] = {}
+            bisect.insort(self.sorted_terms, term)
+        if host not in hosts:
+            hosts[host] = set()
+            for length in range(1, min(len(term), SHORT_PREFIX) + 1):
+                counts = self.short_prefixes.setdefault(term[:length], {})
+                counts[host] = counts.get(host, 0) + 1
+        hosts[host].add(field)
+
+    def _unlink(self, term, host, field):
+        hosts = self.postings.get(term)
+        if hosts is None or host not in hosts:
+            return
+        hosts[host].discard(field)
+        if not hosts[host]:
+            del hosts[host]
+            for length in range(1, min(len(term), SHORT_PREFIX) + 1):
+                counts = self.short_prefixes[term[:length]]
+                counts[host] -= 1
+                if not counts[host]:
+                    del counts[host]
+                    if not counts:
+                        del self.short_prefixes[term[:length]]
+        if not hosts:
+            del self.postings[term]
+            idx = bisect.bisect_left(self.sorted_terms, term)
+            if idx < len(self.sorted_terms) and self.sorted_terms[idx] == term:
+                del self.sorted_terms[idx]
@@ -1,24 +1,24 @@
 import sys
-import subprocess
 import os
+import html
 import json
+import time
+import argparse
+from functools import partial
 from datetime import datetime, timedelta
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-                             QPushButton, QLineEdit, QComboBox, QScrollArea, QFormLayout,
-                             QGridLayout, QFrame, QListWidget, QSizePolicy, QDialog, QDialogButtonBox,
-                             QMessageBox)
-from PyQt5.QtGui import QIcon, QPixmap
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QSize
-from translations import Translator
-
-
-# Global translator
-translator = Translator('en')  # Default to English
-
-
-# Helper function to translate text
-def _(text):
-    return translator.translate(text)
+                             QPushButton, QLineEdit, QComboBox, QScrollArea, QGridLayout, QFrame,
+                             QListWidget, QSizePolicy, QDialog, QMessageBox, QSystemTrayIcon)
+from PyQt5.QtGui import QIcon, QPixmap, QColor, QBrush, QPainter, QPen, QPolygonF
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QSize, QPointF
+from translations import translator, _
+from search_index import FleetIndex, value_terms, NAME, IP, USER, PROCESS, SERVICE, STATE
+from reachability import check_hosts, DEFAULT_PORTS, DEFAULT_TIMEOUT
+from probes import poll_host, UNREACHABLE, CPU, MEMORY, DISK_QUEUE, WORKING_SET
+from host_state import HostState, Fleet, ONLINE, OFFLINE, ERROR, AGENT, POLL
+from groups import build_groups, summarize
+# Feature modules (collector, agent_hub, capture, analytics, events, alerts) are imported where they are set up,
+# so features that are turned off cost nothing at start-up
 
 
 def resource_path(relative_path):
@@ -31,9 +31,41 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+def saved_language():
+    try:
+        with open(CONFIG_FILE, 'r') as f:
+            return json.load(f).get('language')
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def force_requested():
+    """ Shift held while clicking a refresh button skips the result cache """
+    return bool(QApplication.keyboardModifiers() & Qt.ShiftModifier)
+
+
 # Use resource_path to get the correct path for your icons folder
 ICON_PATH = resource_path("icons/")
 CONFIG_FILE = "server_config.json"
+DEFAULT_REFRESH_TTL = 15  # Seconds a poll result is served from cache to non-forced refreshes
+# Performance counters sampled with each poll; history is the ring buffer length per host
+DEFAULT_COUNTERS = {'enabled': True, 'history': 60}
+DEFAULT_REACHABILITY = {'enabled': True, 'ports': list(DEFAULT_PORTS), 'timeout': DEFAULT_TIMEOUT}
+# "thread" polls from one QThread per host; "process" shards hosts across collector processes.
+# 0 / None take the defaults of collector.py and agent_hub.py
+DEFAULT_COLLECTOR = {'mode': 'thread', 'workers': 0, 'threads': 0}
+# Hosts running agent.py push their state; remote polling is the fallback while no agent is live
+DEFAULT_AGENTS = {'enabled': False, 'bind': '0.0.0.0', 'port': None, 'token': None, 'stale_after': None}
+# Per-minute session counts and session dwell times kept for the usage report
+DEFAULT_ANALYTICS = {'enabled': True, 'path': 'analytics', 'retention_days': 35, 'report_days': 30,
+                     'over_ratio': 1.25, 'under_ratio': 0.5, 'persistence': 0.75}
+# Typed events kept in memory for the event panel and written to rotating JSON lines files;
+# slow_poll is the poll duration in seconds that is logged as slow
+DEFAULT_EVENTS = {'enabled': True, 'path': 'events', 'capacity': 2000, 'max_bytes': 5000000, 'backups': 5,
+                  'slow_poll': 10}
+SEARCH_DEBOUNCE_MS = 150
+GROUP_SUMMARY_DELAY_MS = 250  # Poll results arriving within this window update a group's summary row once
+HIGHLIGHT_COLOR = "#FFE066"
 
 
 class ServerMonitor(QMainWindow):
@@ -64,17 +96,39 @@ class ServerMonitor(QMainWindow):
         self.setup_search_bar()
 
         self.load_config()
+        self.setup_alerts()
+        self.reachability_pending = set()  # Names waiting on a reachability pass
+        self.setup_collector()
+        self.setup_agents()
+        self.setup_analytics()
+        self.setup_events()
+
+        self.index = FleetIndex()
+        # One worker per host, owned here so polls survive the cards being rebuilt
+        self.workers = {}
+        for host in self.fleet:
+            self.index_server(host)
+            self.add_worker(host)
 
         # Initialize the server_widgets dictionary
         self.server_widgets = {}
-
-        self.setup_server_widgets()
+        self.group_headers = {}
+        self.dirty_groups = set()
+        self.summary_timer = QTimer(self)
+        self.summary_timer.setSingleShot(True)
+        self.summary_timer.setInterval(GROUP_SUMMARY_DELAY_MS)
+        self.summary_timer.timeout.connect(self.update_group_summaries)
+        # Cards are built when the window is first shown, once the final column count is known
+        self.num_columns = None
 
         self.apply_theme("light")
 
-        self.refresh_timer = QTimer(self)
-        self.refresh_timer.timeout.connect(self.refresh_all_servers)
-        self.refresh_timer.start(60000)  # Refresh every 1 minute
+        # Each group refreshes on its own timer; collapsed groups have no cards to trigger a first poll
+        self.group_timers = {}
+        self.update_groups()
+        for name, group in self.groups.items():
+            if group.collapsed:
+                QTimer.singleShot(0, partial(self.refresh_group, name))
 
         self.last_refresh = datetime.now()
         self.update_refresh_indicator()
@@ -85,30 +139,54 @@ class ServerMonitor(QMainWindow):
         self.resize_timer.timeout.connect(self.update_layout)
         self.last_width = self.width()
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_layout()
+
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        QTimer.singleShot(0, self.setup_server_widgets)  # Redraw widgets after resize
+        QTimer.singleShot(0, self.update_layout)  # Re-flow widgets after resize
 
     def update_layout(self):
         self.last_width = self.width()
-        self.setup_server_widgets()
+        # Cards only need rebuilding when the number of columns changes
+        if self.column_count() != self.num_columns:
+            self.setup_server_widgets()
+
+    def column_count(self):
+        return min(3, max(1, self.scroll_area.viewport().width() // 350))  # Limit to 3 columns maximum
 
     def setup_server_widgets(self):
         # Clear existing widgets
-        for widget in self.server_widgets.values():
+        for widget in list(self.server_widgets.values()) + list(self.group_headers.values()):
             self.scroll_layout.removeWidget(widget)
             widget.deleteLater()
         self.server_widgets.clear()
-
-        window_width = self.scroll_area.viewport().width()
-        num_columns = min(3, max(1, window_width // 350))  # Limit to 3 columns maximum
-
-        for idx, (name, ip, processes, services) in enumerate(self.servers):
-            server_widget = ServerWidget(name, ip, self.ti_users, processes, services, self)
-            self.server_widgets[name] = server_widget
-            row = idx // num_columns
-            col = idx % num_columns
-            self.scroll_layout.addWidget(server_widget, row, col)
+        self.group_headers.clear()
+
+        self.num_columns = num_columns = self.column_count()
+
+        # Without named groups the fleet is one grid, as before; otherwise each group gets a header row
+        # and collapsed groups show only that row
+        show_headers = any(self.groups)
+        row = 0
+        for name, group in self.groups.items():
+            hosts = self.group_members.get(name)
+            if not hosts:
+                continue
+            if show_headers:
+                header = GroupHeader(group, self)
+                header.update_summary(hosts)
+                self.group_headers[name] = header
+                self.scroll_layout.addWidget(header, row, 0, 1, num_columns)
+                row += 1
+                if group.collapsed:
+                    continue
+            for idx, host in enumerate(hosts):
+                server_widget = ServerWidget(host, self)
+                self.server_widgets[host.name] = server_widget
+                self.scroll_layout.addWidget(server_widget, row + idx // num_columns, idx % num_columns)
+            row += (len(hosts) + num_columns - 1) // num_columns
 
         # Set the minimum width of the scroll widget to ensure proper layout
         min_width = num_columns * 350 + (num_columns - 1) * self.scroll_layout.spacing()
@@ -122,23 +200,57 @@ class ServerMonitor(QMainWindow):
         self.scroll_widget.updateGeometry()
         self.scroll_area.updateGeometry()
 
+        self.filter_servers()
+
     def setup_search_bar(self):
         search_layout = QHBoxLayout()
         search_label = QLabel(_("Search:"))
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText(_("Type to search servers..."))
-        self.search_input.textChanged.connect(self.filter_servers)
+        self.search_input.setPlaceholderText(_("Search servers, IPs, users, processes, states..."))
+        # Debounce keystrokes so the index is queried once typing pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.filter_servers)
+        self.search_input.textChanged.connect(self.search_timer.start)
         search_layout.addWidget(search_label)
         search_layout.addWidget(self.search_input)
         self.layout.addLayout(search_layout)
 
     def filter_servers(self):
-        search_text = self.search_input.text().lower()
+        text = self.search_input.text()
+        results = self.index.search(text)
         for name, server_widget in self.server_widgets.items():
-            if search_text in name.lower():
+            if results is None:
+                server_widget.highlight(None)
+                server_widget.show()
+            elif name in results:
+                server_widget.highlight(self.index.matched_terms(name, text))
                 server_widget.show()
             else:
                 server_widget.hide()
+        for name, header in self.group_headers.items():
+            hosts = self.group_members[name]
+            header.matches = None if results is None else sum(host.name in results for host in hosts)
+            header.setVisible(header.matches != 0)
+            header.update_summary(hosts)
+
+    def index_server(self, host):
+        self.index.update_host(host.name, **{NAME: [host.name], IP: [host.ip], PROCESS: host.processes,
+                                             SERVICE: host.services})
+
+    def index_results(self, host):
+        states = [host.status]
+        watched = host.processes + host.services
+        if any(host.is_running(item) for item in watched):
+            states.append("running")
+        if any(not host.is_running(item) for item in watched):
+            states.append("stopped")
+        self.index.update_host(host.name, **{USER: host.users, STATE: states})
+
+        # New results can change what matches; re-filter once the burst of results settles
+        if self.search_input.text().strip() and not self.search_timer.isActive():
+            self.search_timer.start()
 
     def setup_header(self):
         header_layout = QHBoxLayout()
@@ -154,7 +266,8 @@ class ServerMonitor(QMainWindow):
         header_layout.addWidget(self.refresh_indicator)
 
         refresh_all_button = QPushButton(_("Refresh All"))
-        refresh_all_button.clicked.connect(self.refresh_all_servers)
+        refresh_all_button.setToolTip(_("Shift+click to bypass recent results"))
+        refresh_all_button.clicked.connect(lambda: self.refresh_all_servers(force=force_requested()))
         header_layout.addWidget(refresh_all_button)
 
         configure_ti_button = QPushButton(_("Configure IT"))
@@ -165,6 +278,14 @@ class ServerMonitor(QMainWindow):
         add_server_button.clicked.connect(self.open_add_server_dialog)
         header_layout.addWidget(add_server_button)
 
+        usage_report_button = QPushButton(_("Usage Report"))
+        usage_report_button.clicked.connect(self.open_usage_report)
+        header_layout.addWidget(usage_report_button)
+
+        events_button = QPushButton(_("Events"))
+        events_button.clicked.connect(self.open_event_panel)
+        header_layout.addWidget(events_button)
+
         self.layout.addLayout(header_layout)
 
     def setup_theme_selector(self):
@@ -180,75 +301,391 @@ class ServerMonitor(QMainWindow):
         self.layout.addLayout(theme_layout)
 
 
-    def refresh_all_servers(self):
-        for server_widget in self.server_widgets.values():
-            server_widget.refresh_users()
-        self.last_refresh = datetime.now()
+    def refresh_all_servers(self, force=False):
+        self.refresh_servers(self.fleet.names(), force)
+
+    def refresh_group(self, name):
+        group = self.groups.get(name)
+        if group is not None:
+            # Timer ticks must not be skipped as fresh when the interval is close to the refresh TTL
+            self.refresh_servers([host.name for host in self.group_members.get(name, ())],
+                                 max_age=min(self.refresh_ttl, group.poll_interval() / 2))
+
+    def refresh_servers(self, names, force=False, max_age=None):
+        names = [name for name in names if self.needs_poll(name, force, max_age)]
+        if self.reachability['enabled']:
+            # One concurrent reachability pass per batch; dead hosts skip the probes
+            if names:
+                self.reachability_pending.update(names)
+                for name in names:
+                    self.show_loading(name)
+                ips = [self.fleet[name].ip for name in names]
+                worker = ReachabilityWorker(ips, self.reachability, self)
+                worker.checked.connect(partial(self.apply_reachability, names))
+                worker.finished.connect(worker.deleteLater)
+                worker.start()
+        else:
+            for name in names:
+                self.start_poll(name)
+        if names:
+            self.last_refresh = datetime.now()
         self.update_refresh_indicator()
 
+    def start_group_timer(self, name):
+        """ (Re)start a group's refresh timer at the interval of its current state """
+        timer = self.group_timers.get(name)
+        if timer is None:
+            timer = self.group_timers[name] = QTimer(self)
+            timer.timeout.connect(partial(self.refresh_group, name))
+        timer.start(int(self.groups[name].poll_interval() * 1000))
+
+    def update_groups(self):
+        """ Rebuild groups and their members after servers were added or removed, keeping configured groups first
+        and ungrouped servers last """
+        self.groups = build_groups(self.groups_config(), self.fleet)
+        self.group_members = self.fleet.by_group()
+        for name in self.groups:
+            if name not in self.group_timers:
+                self.start_group_timer(name)
+        for name in [name for name in self.group_timers if name not in self.groups]:
+            self.group_timers.pop(name).deleteLater()
+
+    def groups_config(self):
+        return {name: group.to_config() for name, group in self.groups.items()}
+
+    def toggle_group(self, name):
+        group = self.groups[name]
+        group.collapsed = not group.collapsed
+        self.start_group_timer(name)
+        self.save_config()
+        self.setup_server_widgets()
+
+    def update_group_summaries(self):
+        for name in self.dirty_groups:
+            if name in self.group_headers:
+                self.group_headers[name].update_summary(self.group_members[name])
+        self.dirty_groups.clear()
+
+    def apply_reachability(self, names, latencies):
+        self.reachability_pending.difference_update(names)
+        for name in names:
+            host = self.fleet.get(name)
+            if host is None or self.is_polling(name):
+                continue
+            latency = latencies.get(host.ip)
+            if latency is None:
+                self.handle_poll_result(name, [UNREACHABLE], [], [], None, None)
+            else:
+                self.start_poll(name, latency)
+
+    def setup_collector(self):
+        self.collector = None
+        # Capture and replay hook the probes of this process only, so they keep polls on threads
+        capturing = 'capture' in sys.modules and sys.modules['capture'].is_active()
+        if self.collector_config['mode'] == 'process' and not capturing:
+            from collector import ShardedCollector, DEFAULT_THREADS_PER_WORKER
+            self.collector = ShardedCollector(self.reachability, self.collector_config['workers'] or None,
+                                              self.collector_config['threads'] or DEFAULT_THREADS_PER_WORKER,
+                                              self.counters_config['enabled'])
+            self.collector_bridge = CollectorBridge(self.collector, self)
+            self.collector_bridge.result.connect(self.handle_poll_result)
+            self.collector_bridge.start()
+
+    def setup_agents(self):
+        self.agent_hub = None
+        self.agent_names = {}  # server name -> name the agent reports
+        if self.agents_config['enabled']:
+            from agent import DEFAULT_PORT
+            from agent_hub import AgentHub, DEFAULT_STALE_AFTER
+            hub = AgentHub(self.agents_config['bind'], self.agents_config['port'] or DEFAULT_PORT,
+                           self.agents_config['token'], self.agents_config['stale_after'] or DEFAULT_STALE_AFTER)
+            try:
+                hub.start()
+            except (OSError, ValueError):
+                return  # Port in use, or no token configured
+            self.agent_hub = hub
+            self.agent_listener = AgentListener(hub, self)
+            self.agent_listener.snapshot.connect(self.handle_agent_snapshot)
+            self.agent_listener.start()
+
+    def setup_analytics(self):
+        self.session_store = None
+        self.report_worker = None
+        if self.analytics_config['enabled']:
+            import analytics
+            self.session_store = analytics.SessionStore(self.analytics_config['path'],
+                                                        self.analytics_config['retention_days'])
+            self.analytics_timer = QTimer(self)
+            self.analytics_timer.timeout.connect(self.session_store.flush)
+            self.analytics_timer.start(60000)
+
+    def open_usage_report(self):
+        if self.session_store is None:
+            return
+        import analytics
+        if not analytics.has_numpy():
+            QMessageBox.information(self, _("Usage Report"), _("Install NumPy to build usage reports."))
+            return
+        if self.report_worker is not None and self.report_worker.isRunning():
+            return
+        self.session_store.flush()
+        self.report_worker = UsageReportWorker(self.session_store, self.analytics_config, self)
+        self.report_worker.finished.connect(self.show_usage_report)
+        self.report_worker.start()
+
+    def show_usage_report(self, report):
+        if not any(report.values()):
+            QMessageBox.information(self, _("Usage Report"), _("No session data recorded yet."))
+            return
+        from dialogs import UsageReportDialog
+        UsageReportDialog(report, self).exec_()
+
+    def setup_events(self):
+        self.event_log = None
+        self.event_panel = None
+        self.poll_started = {}  # name -> monotonic time the running poll started
+        if self.events_config['enabled']:
+            from events import EventLog
+            self.event_log = EventLog(self.events_config['path'], self.events_config['capacity'],
+                                      self.events_config['max_bytes'], self.events_config['backups'])
+
+    def open_event_panel(self):
+        if self.event_log is None:
+            return
+        if self.event_panel is None:
+            from dialogs import EventPanel
+            self.event_panel = EventPanel(self.event_log, self)
+        self.event_panel.show()
+        self.event_panel.raise_()
+
+    def log_poll_events(self, name, before, host, source):
+        from events import poll_events
+        started = self.poll_started.pop(name, None)
+        duration = time.monotonic() - started if started is not None and source == POLL else None
+        for event in poll_events(name, before, host, duration, self.events_config['slow_poll']):
+            self.event_log.emit(event)
+
+    def closeEvent(self, event):
+        if self.event_log is not None:
+            self.event_log.close()
+        if self.session_store is not None:
+            self.session_store.flush(final=True)
+        if self.collector is not None:
+            self.collector_bridge.requestInterruption()
+            self.collector_bridge.wait()
+            self.collector.close()
+        if self.agent_hub is not None:
+            self.agent_listener.requestInterruption()
+            self.agent_listener.wait()
+            self.agent_hub.close()
+        super().closeEvent(event)
+
+    def has_live_agent(self, name):
+        return self.agent_hub is not None and self.agent_hub.is_live(self.agent_names.get(name, name))
+
+    def handle_agent_snapshot(self, agent_name, peer, sessions, processes, services):
+        host = self.fleet.get(agent_name) or self.fleet.find_by_ip(peer)
+        if host is None:
+            return
+        self.agent_names[host.name] = agent_name
+        processes = {process.lower() for process in processes}
+        services = {service.lower() for service in services}
+        running_processes = [process for process in host.processes if process.lower() in processes]
+        running_services = [service for service in host.services if service.lower() in services]
+        self.handle_poll_result(host.name, sessions, running_processes, running_services, None, None, AGENT)
+
+    def is_polling(self, name):
+        # Thread workers also poll in process mode while no collector process can take the host
+        if self.collector is not None and self.collector.is_pending(name):
+            return True
+        return self.workers[name].isRunning()
+
+    def add_worker(self, host):
+        worker = QwinstaWorker(host, self.reachability, self.counters_config['enabled'], self)
+        worker.finished.connect(partial(self.handle_poll_result, host.name))
+        self.workers[host.name] = worker
+
+    def needs_poll(self, name, force=False, max_age=None):
+        """ False while a poll or reachability pass is in flight (callers attach to it) or the last result is
+        still fresh """
+        if name in self.reachability_pending or self.is_polling(name) or self.has_live_agent(name):
+            return False
+        age = self.fleet[name].age()
+        return force or age is None or age >= (self.refresh_ttl if max_age is None else max_age)
+
+    def request_poll(self, name, force=False):
+        if self.needs_poll(name, force):
+            self.start_poll(name)
+
+    def start_poll(self, name, latency=None):
+        self.show_loading(name)
+        self.poll_started[name] = time.monotonic()
+        if self.collector is not None:
+            host = self.fleet[name]
+            if self.collector.poll(name, host.ip, host.processes, host.services, latency):
+                return
+            # Every collector process is down and waiting to be restarted; poll from a thread meanwhile
+        self.workers[name].latency = latency
+        self.workers[name].start()
+
+    def show_loading(self, name):
+        if name in self.server_widgets:
+            self.server_widgets[name].show_loading()
+
+    def handle_poll_result(self, name, users, running_processes, running_services, counters, latency,
+                           source=POLL):
+        host = self.fleet.get(name)
+        if host is None:
+            return  # Server was removed while its poll was running
+        if self.event_log is not None:
+            from events import snapshot
+            before = snapshot(host)
+        host.apply_result(users, running_processes, running_services, counters, latency,
+                          self.counters_config['history'], source)
+        if self.event_log is not None:
+            self.log_poll_events(name, before, host, source)
+        alerts = self.evaluate_alerts(host)
+        if self.session_store is not None and host.status == ONLINE:
+            self.session_store.observe(name, host.users)
+        if name in self.server_widgets:
+            self.server_widgets[name].update_results()
+            self.server_widgets[name].show_alerts(alerts)
+        if host.group in self.group_headers:
+            self.dirty_groups.add(host.group)
+            if not self.summary_timer.isActive():
+                self.summary_timer.start()
+        self.index_results(host)
+
     def update_refresh_indicator(self):
-        next_refresh = self.last_refresh + timedelta(minutes=1)
+        # The soonest of the group timers
+        remaining = [timer.remainingTime() for timer in self.group_timers.values() if timer.isActive()]
+        next_refresh = datetime.now() + timedelta(milliseconds=min(remaining, default=60000))
         self.refresh_indicator.setText(
             f"Last Update: {self.last_refresh.strftime('%H:%M:%S')} | Next: {next_refresh.strftime('%H:%M:%S')}")
 
     def open_ti_config(self):
+        from dialogs import TIConfigDialog
         dialog = TIConfigDialog(self.ti_users, self)
         if dialog.exec_():
             self.ti_users = dialog.get_ti_users()
             self.save_config()
-            for server_widget in self.server_widgets.values():
-                server_widget.update_ti_users(self.ti_users)
+            self.alert_engine.compile(self.alert_rules, self.ti_users)
+            # Every host, including those in collapsed groups that have no card
+            for host in self.fleet:
+                self.alert_engine.recheck(host.name)
+            for name, server_widget in self.server_widgets.items():
+                server_widget.show_alerts(self.alert_engine.active_alerts(name))
+
+    def setup_alerts(self):
+        self.tray_icon = None
+        if any(sink.get('type') == 'tray' for sink in self.alert_sinks) and QSystemTrayIcon.isSystemTrayAvailable():
+            self.tray_icon = QSystemTrayIcon(QIcon(resource_path('favicon.ico')), self)
+            self.tray_icon.show()
+        notify = self.show_tray_message if self.tray_icon else None
+        from alerts import AlertEngine, build_sinks
+        self.alert_engine = AlertEngine(self.alert_rules, self.ti_users, build_sinks(self.alert_sinks, notify),
+                                        self.alert_cooldown)
+
+    def show_tray_message(self, title, message):
+        self.tray_icon.showMessage(title, message, QSystemTrayIcon.Warning)
+
+    def evaluate_alerts(self, host):
+        # A probe error means the host answered, so it must not count towards host_unreachable
+        self.alert_engine.observe(host.name, host.users if host.status == ONLINE else None, host.services,
+                                  host.running_services, host.status != OFFLINE)
+        return self.alert_engine.active_alerts(host.name)
 
     def open_add_server_dialog(self):
-        dialog = AddServerDialog(self)
+        from dialogs import AddServerDialog
+        dialog = AddServerDialog([name for name in self.groups if name], self)
         if dialog.exec_():
-            name, ip = dialog.get_server_info()
-            self.add_server(name, ip)
-
-    def add_server(self, name, ip):
-        self.servers.append((name, ip, [], []))  # Add empty lists for processes and services
-        server_widget = ServerWidget(name, ip, self.ti_users, [], [], self)
-        self.server_widgets[name] = server_widget
+            name, ip, group = dialog.get_server_info()
+            if name in self.fleet:
+                QMessageBox.warning(self, _("Add Server"), _("A server with this name already exists."))
+                return
+            self.add_server(name, ip, group)
+
+    def add_server(self, name, ip, group=''):
+        host = self.fleet.add(HostState(name, ip, group=group))
+        self.index_server(host)
+        self.add_worker(host)
+        self.update_groups()
         self.save_config()
         self.setup_server_widgets()
+        # A server in a collapsed group has no card to start its first poll
+        self.request_poll(host.name)
 
 
     def remove_server(self, name):
         if name in self.server_widgets:
             server_widget = self.server_widgets.pop(name)
             server_widget.deleteLater()
-            self.servers = [server for server in self.servers if server[0] != name]
+            self.fleet.remove(name)
+            self.reachability_pending.discard(name)
+            self.index.remove_host(name)
+            self.alert_engine.forget(name)
+            if self.session_store is not None:
+                self.session_store.forget(name)
+            worker = self.workers.pop(name)
+            if worker.isRunning():
+                worker.finished.connect(worker.deleteLater)
+            else:
+                worker.deleteLater()
+            self.update_groups()
             self.save_config()
             self.setup_server_widgets()
 
     def load_config(self):
+        from alerts import DEFAULT_RULES, DEFAULT_SINKS, DEFAULT_COOLDOWN
         try:
             with open(CONFIG_FILE, 'r') as f:
                 config = json.load(f)
-            self.servers = []
-            for server in config.get('servers', []):
-                if isinstance(server, dict):
-                    self.servers.append((
-                        server['name'],
-                        server['ip'],
-                        server.get('processes', []),
-                        server.get('services', [])
-                    ))
-                else:
-                    # Unexpected format, skip this server
-                    continue
+            self.fleet = Fleet.from_config(config.get('servers', []))
+            self.language = config.get('language')
             self.ti_users = config.get('ti_users', [])
+            self.alert_rules = config.get('alert_rules', DEFAULT_RULES)
+            self.alert_sinks = config.get('alert_sinks', DEFAULT_SINKS)
+            self.alert_cooldown = config.get('alert_cooldown', DEFAULT_COOLDOWN)
+            self.reachability = {**DEFAULT_REACHABILITY, **config.get('reachability', {})}
+            self.refresh_ttl = config.get('refresh_ttl', DEFAULT_REFRESH_TTL)
+            self.collector_config = {**DEFAULT_COLLECTOR, **config.get('collector', {})}
+            self.agents_config = {**DEFAULT_AGENTS, **config.get('agents', {})}
+            self.counters_config = {**DEFAULT_COUNTERS, **config.get('counters', {})}
+            self.analytics_config = {**DEFAULT_ANALYTICS, **config.get('analytics', {})}
+            self.events_config = {**DEFAULT_EVENTS, **config.get('events', {})}
+            self.groups = build_groups(config.get('groups', {}), self.fleet)
         except FileNotFoundError:
-            self.servers = [
-                ("Default Gateway", "192.6.1.1", [], [])
-            ]
+            self.fleet = Fleet([HostState("Default Gateway", "192.6.1.1")])
+            self.language = None
             self.ti_users = []
+            self.alert_rules = DEFAULT_RULES
+            self.alert_sinks = DEFAULT_SINKS
+            self.alert_cooldown = DEFAULT_COOLDOWN
+            self.reachability = dict(DEFAULT_REACHABILITY)
+            self.refresh_ttl = DEFAULT_REFRESH_TTL
+            self.collector_config = dict(DEFAULT_COLLECTOR)
+            self.agents_config = dict(DEFAULT_AGENTS)
+            self.counters_config = dict(DEFAULT_COUNTERS)
+            self.analytics_config = dict(DEFAULT_ANALYTICS)
+            self.events_config = dict(DEFAULT_EVENTS)
+            self.groups = build_groups({}, self.fleet)
 
     def save_config(self):
         config = {
-            'servers': [{'name': name, 'ip': ip, 'processes': processes, 'services': services} for
-                        name, ip, processes, services in self.servers],
-            'ti_users': self.ti_users
+            'servers': self.fleet.to_config(),
+            'language': self.language,
+            'ti_users': self.ti_users,
+            'alert_rules': self.alert_rules,
+            'alert_sinks': self.alert_sinks,
+            'alert_cooldown': self.alert_cooldown,
+            'reachability': self.reachability,
+            'refresh_ttl': self.refresh_ttl,
+            'collector': self.collector_config,
+            'agents': self.agents_config,
+            'counters': self.counters_config,
+            'analytics': self.analytics_config,
+            'events': self.events_config,
+            'groups': self.groups_config()
         }
         with open(CONFIG_FILE, 'w') as f:
             json.dump(config, f)
@@ -407,13 +844,11 @@ class ServerMonitor(QMainWindow):
 
 
 class ServerWidget(QFrame):
-    def __init__(self, name, ip, ti_users, processes, services, parent):
+    def __init__(self, host, parent):
         super().__init__()
-        self.name = name
-        self.ip = ip
-        self.ti_users = ti_users
-        self.processes = processes
-        self.services = services
+        self.host = host
+        self.name = host.name
+        self.ip = host.ip
         self.parent = parent
         self.layout = QVBoxLayout(self)
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
@@ -421,7 +856,7 @@ class ServerWidget(QFrame):
         header_layout = QHBoxLayout()
         server_icon = QLabel()
         server_icon.setPixmap(QIcon(f"{ICON_PATH}server.svg").pixmap(QSize(24, 24)))
-        self.name_label = QLabel(f"<b>{name}</b>")
+        self.name_label = QLabel(f"<b>{html.escape(self.name)}</b>")
         self.status_indicator = QLabel()
         self.status_indicator.setFixedSize(16, 16)
         self.status_indicator.setStyleSheet("background-color: gray; border-radius: 8px;")
@@ -435,12 +870,28 @@ class ServerWidget(QFrame):
         ip_layout = QHBoxLayout()
         ip_icon = QLabel()
         ip_icon.setPixmap(QIcon(f"{ICON_PATH}ip.svg").pixmap(QSize(24, 24)))
-        self.ip_label = QLabel(f"IP: {ip}")
+        self.ip_label = QLabel(f"IP: {self.ip}")
         ip_layout.addWidget(ip_icon)
         ip_layout.addWidget(self.ip_label)
         ip_layout.addStretch()
+        self.latency_label = QLabel()
+        ip_layout.addWidget(self.latency_label)
         self.layout.addLayout(ip_layout)
 
+        self.counters_widget = QWidget()
+        counters_layout = QGridLayout(self.counters_widget)
+        counters_layout.setContentsMargins(0, 0, 0, 0)
+        self.sparklines = {}
+        self.counter_labels = {}
+        for column, (key, color, maximum) in enumerate(((CPU, "#E53935", 100), (MEMORY, "#1E88E5", None),
+                                                        (DISK_QUEUE, "#FB8C00", None))):
+            self.counter_labels[key] = QLabel()
+            self.sparklines[key] = Sparkline(color, maximum)
+            counters_layout.addWidget(self.counter_labels[key], 0, column)
+            counters_layout.addWidget(self.sparklines[key], 1, column)
+        self.layout.addWidget(self.counters_widget)
+        self.counters_widget.hide()
+
         users_layout = QHBoxLayout()
         users_icon = QLabel()
         users_icon.setPixmap(QIcon(f"{ICON_PATH}users.svg").pixmap(QSize(24, 24)))
@@ -500,6 +951,7 @@ class ServerWidget(QFrame):
 
         button_layout = QHBoxLayout()
         self.refresh_button = QPushButton(_("Update"))
+        self.refresh_button.setToolTip(_("Shift+click to bypass recent results"))
         self.refresh_button.setIcon(QIcon(f"{ICON_PATH}refresh.svg"))
         self.refresh_button.clicked.connect(self.refresh_users)
         button_layout.addWidget(self.refresh_button)
@@ -524,76 +976,92 @@ class ServerWidget(QFrame):
         self.setLayout(self.layout)
         self.setFrameShape(QFrame.StyledPanel)
 
-        self.worker = QwinstaWorker(self.ip, self.processes, self.services)
-        self.worker.finished.connect(self.update_users)
-        self.worker.start()
-
         self.blink_timer = QTimer(self)
         self.blink_timer.timeout.connect(self.toggle_indicator)
         self.blink_state = False
         self.blink_timer.setInterval(1000)  # Slower blink, every 1 second
 
+        self.show_alerts(self.parent.alert_engine.active_alerts(self.name))
+
+        # A rebuilt card shows the last result and only polls if it is stale
+        if host.polled_at:
+            self.update_results()
+        self.parent.request_poll(self.name)
+        if self.parent.is_polling(self.name):
+            self.show_loading()
+
     def refresh_users(self):
+        self.parent.request_poll(self.name, force=force_requested())
+
+    def show_loading(self):
         self.users_list.clear()
         self.users_list.addItem("Loading...")
-        self.worker.start()
 
-    def update_users(self, users, running_processes, running_services):
+    def update_results(self):
+        host = self.host
         self.users_list.clear()
-        for user in users:
+        for user in (host.users if host.status == ONLINE else [host.message]):
             self.users_list.addItem(user)
 
-        if users:
+        if host.source == AGENT:
+            self.latency_label.setText(_("Agent"))
+        elif host.latency is not None:
+            self.latency_label.setText(f"{host.latency:.0f} ms")
+        elif host.message == UNREACHABLE:
+            self.latency_label.setText(f"<span style='color: red;'>{_('Unreachable')}</span>")
+
+        if host.users:
             self.status_indicator.setStyleSheet("background-color: #4CAF50; border-radius: 8px;")
             self.blink_timer.start()
         else:
             self.status_indicator.setStyleSheet("background-color: gray; border-radius: 8px;")
             self.blink_timer.stop()
 
-        self.update_ti_warning(users)
-        self.update_processes_status(running_processes)
-        self.update_services_status(running_services)
+        self.update_processes_status()
+        self.update_services_status()
+        if host.counters:
+            self.update_counters()
 
     def open_monitor_processes_dialog(self):
-        dialog = MonitorProcessesDialog(self.processes, self)
+        from dialogs import MonitorProcessesDialog
+        dialog = MonitorProcessesDialog(self.host.processes, self)
         if dialog.exec_():
-            self.processes = dialog.get_processes()
+            self.host.set_processes(dialog.get_processes())
             self.update_processes_list()
-            self.worker.processes = self.processes
             self.parent.save_config()
+            self.parent.index_server(self.host)
 
     def open_monitor_services_dialog(self):
-        dialog = MonitorServicesDialog(self.services, self)
+        from dialogs import MonitorServicesDialog
+        dialog = MonitorServicesDialog(self.host.services, self)
         if dialog.exec_():
-            self.services = dialog.get_services()
+            self.host.set_services(dialog.get_services())
             self.update_services_list()
-            self.worker.services = self.services
             self.parent.save_config()
+            self.parent.index_server(self.host)
 
     def update_processes_list(self):
         self.processes_list.clear()
-        for process in self.processes:
+        for process in self.host.processes:
             self.processes_list.addItem(process)
 
     def update_services_list(self):
         self.services_list.clear()
-        for service in self.services:
+        for service in self.host.services:
             self.services_list.addItem(service)
 
-    def update_processes_status(self, running_processes):
+    def update_processes_status(self):
         for i in range(self.processes_list.count()):
             item = self.processes_list.item(i)
-            process = item.text()
-            if process in running_processes:
+            if item.text() in self.host.running_processes:
                 item.setForeground(Qt.green)
             else:
                 item.setForeground(Qt.red)
 
-    def update_services_status(self, running_services):
+    def update_services_status(self):
         for i in range(self.services_list.count()):
             item = self.services_list.item(i)
-            service = item.text()
-            if service in running_services:
+            if item.text() in self.host.running_services:
                 item.setForeground(Qt.green)
             else:
                 item.setForeground(Qt.red)
@@ -603,19 +1071,58 @@ class ServerWidget(QFrame):
         opacity = 1 if self.blink_state else 0.5
         self.status_indicator.setStyleSheet(f"background-color: rgba(76, 175, 80, {opacity}); border-radius: 8px;")
 
-    def update_ti_users(self, ti_users):
-        self.ti_users = ti_users
-        self.update_ti_warning([self.users_list.item(i).text() for i in range(self.users_list.count())])
-
-    def update_ti_warning(self, users):
-        detected_ti = [user for user in users if user in self.ti_users]
-        if detected_ti:
+    def highlight(self, matches):
+        matches = matches or set()
+        matched = {field: {term for f, term in matches if f == field}
+                   for field in (NAME, IP, USER, PROCESS, SERVICE, STATE)}
+
+        name_hit = matched[NAME] & value_terms(self.name) or matched[STATE]
+        self.name_label.setText(self.mark(self.name, name_hit, bold=True))
+        self.ip_label.setText(f"IP: {self.mark(self.ip, matched[IP] & value_terms(self.ip))}")
+
+        for list_widget, field in ((self.users_list, USER), (self.processes_list, PROCESS),
+                                   (self.services_list, SERVICE)):
+            for i in range(list_widget.count()):
+                item = list_widget.item(i)
+                if matched[field] & value_terms(item.text()):
+                    item.setBackground(QColor(HIGHLIGHT_COLOR))
+                else:
+                    item.setBackground(QBrush())
+
+    def mark(self, text, hit, bold=False):
+        text = html.escape(text)
+        if hit:
+            text = f'<span style="background-color: {HIGHLIGHT_COLOR};">{text}</span>'
+        return f"<b>{text}</b>" if bold else text
+
+    def update_counters(self):
+        history = self.host.counters
+        latest = history[-1]
+        for key, label, unit in ((CPU, _("CPU"), "%"), (MEMORY, _("Free memory"), " MB"),
+                                 (DISK_QUEUE, _("Disk queue"), "")):
+            value = latest.get(key)
+            label_text = f"{label}: {value:.0f}{unit}" if value is not None else f"{label}: -"
+            self.counter_labels[key].setText(label_text)
+            self.sparklines[key].set_values([sample.get(key) for sample in history])
+        self.counters_widget.show()
+
+        working_sets = latest.get(WORKING_SET) or {}
+        for i in range(self.processes_list.count()):
+            item = self.processes_list.item(i)
+            working_set = working_sets.get(item.text())
+            item.setToolTip(f"{_('Working set:')} {working_set / 1048576:.0f} MB" if working_set else "")
+
+    def show_alerts(self, alerts):
+        from alerts import IT_USER
+        detected_ti = [alert.subject for alert in alerts if alert.kind == IT_USER]
+        lines = [f"{_('IT detected:')} {', '.join(detected_ti)}"] if detected_ti else []
+        lines.extend(alert.message for alert in alerts if alert.kind != IT_USER)
+        if lines:
             icon_pixmap = QIcon(f"{ICON_PATH}it_icon.svg").pixmap(QSize(16, 16))
             self.ti_icon_label.setPixmap(icon_pixmap)
             self.ti_icon_label.setFixedSize(16, 16)  # Fix the size of the icon
 
-            warning_text = f"{_('IT detected:')} {', '.join(detected_ti)}"
-            self.ti_warning_label.setText(warning_text)
+            self.ti_warning_label.setText("\n".join(lines))
 
             self.ti_warning_widget.show()
         else:
@@ -628,248 +1135,191 @@ class ServerWidget(QFrame):
         if reply == QMessageBox.Yes:
             self.parent.remove_server(self.name)
 
-    def open_monitor_services_dialog(self):
-        dialog = MonitorServicesDialog(self.services, self)
-        if dialog.exec_():
-            self.services = dialog.get_services()
-            self.update_services_list()
-            self.worker.services = self.services
-            self.parent.save_config()
 
-    def update_services_list(self):
-        self.services_list.clear()
-        for service in self.services:
-            self.services_list.addItem(service)
+class GroupHeader(QFrame):
+    """ Collapsible section row: group name, polling interval and status counts of its servers """
 
-    def update_services_status(self, running_services):
-        for i in range(self.services_list.count()):
-            item = self.services_list.item(i)
-            service = item.text()
-            if service in running_services:
-                item.setForeground(Qt.green)
-            else:
-                item.setForeground(Qt.red)
-
-
-class QwinstaWorker(QThread):
-    finished = pyqtSignal(list, list, list)
-
-    def __init__(self, ip, processes, services):
+    def __init__(self, group, parent):
         super().__init__()
-        self.ip = ip
-        self.processes = processes
-        self.services = services
-
-    def run(self):
-        try:
-            if self.ip == "10.12.82.2":  # Special handling for Windows Server 2012 R2
-                result = subprocess.run(["qwinsta", "/server:" + self.ip], capture_output=True, text=True,
-                                        encoding='utf-16-le', creationflags=subprocess.CREATE_NO_WINDOW)
-            else:
-                result = subprocess.run(["qwinsta", "/server:" + self.ip], capture_output=True, text=True,
-                                        creationflags=subprocess.CREATE_NO_WINDOW)
-
-            if result.stdout:  # Check if there's any output
-                users = [line.split()[1] for line in result.stdout.splitlines()[1:] if "rdp-tcp#" in line.lower()]
-            else:
-                users = ["No server response."]
-
-            running_processes = self.check_processes()
-            running_services = self.check_services()
-            self.finished.emit(users, running_processes, running_services)
+        self.group = group
+        self.parent = parent
+        self.matches = None  # Servers matching the current search, None when not searching
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(8, 4, 8, 4)
+        self.toggle_button = QPushButton("▶" if group.collapsed else "▼")
+        self.toggle_button.setFixedWidth(32)
+        self.toggle_button.setToolTip(_("Expand") if group.collapsed else _("Collapse"))
+        self.toggle_button.clicked.connect(lambda: self.parent.toggle_group(self.group.name))
+        layout.addWidget(self.toggle_button)
+        layout.addWidget(QLabel(f"<b>{html.escape(group.name) if group.name else _('Ungrouped')}</b>"))
+        self.interval_label = QLabel()
+        layout.addWidget(self.interval_label)
+        layout.addStretch()
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.setFrameShape(QFrame.StyledPanel)
 
-        except Exception as e:
-            self.finished.emit([f"Error: {str(e)}"], [], [])
+    def update_summary(self, hosts):
+        summary = summarize(hosts)
+        self.interval_label.setText(f"{_(self.group.priority)} · {_('every')} {self.group.poll_interval():g} s")
+        parts = [f"{summary['servers']} {_('servers')}", f"{summary[ONLINE]} {_('online')}"]
+        if summary[OFFLINE]:
+            parts.append(f"<span style='color: red;'>{summary[OFFLINE]} {_('unreachable')}</span>")
+        if summary[ERROR]:
+            parts.append(f"<span style='color: red;'>{summary[ERROR]} {_('errors')}</span>")
+        parts.append(f"{summary['sessions']} {_('sessions')}")
+        if self.matches is not None:
+            parts.append(f"<b>{self.matches} {_('matches')}</b>")
+        self.summary_label.setText(" · ".join(parts))
 
-    def check_processes(self):
-        running_processes = []
-        for process in self.processes:
-            try:
-                result = subprocess.run(["tasklist", "/S", self.ip, "/NH", "/FI", f"IMAGENAME eq {process}"],
-                                        capture_output=True, text=True, creationflags=subprocess.CREATE_NO_WINDOW)
-                if process.lower() in result.stdout.lower():
-                    running_processes.append(process)
-            except Exception:
-                pass
-        return running_processes
-
-    def check_services(self):
-        running_services = []
-        for service in self.services:
-            try:
-                result = subprocess.run(["sc", "\\\\" + self.ip, "query", service], capture_output=True, text=True,
-                                        creationflags=subprocess.CREATE_NO_WINDOW)
-                if "RUNNING" in result.stdout:
-                    running_services.append(service)
-            except Exception:
-                pass
-        return running_services
 
+class ReachabilityWorker(QThread):
+    checked = pyqtSignal(dict)
 
-class TIConfigDialog(QDialog):
-    def __init__(self, ti_users, parent=None):
+    def __init__(self, ips, reachability, parent=None):
         super().__init__(parent)
-        self.setWindowTitle(_("Configure IT Users"))
-        self.layout = QVBoxLayout(self)
-
-        self.ti_users_list = QListWidget()
-        self.ti_users_list.addItems(ti_users)
-        self.layout.addWidget(self.ti_users_list)
-
-        self.new_user_input = QLineEdit()
-        self.layout.addWidget(self.new_user_input)
+        self.ips = ips
+        self.reachability = reachability
 
-        add_button = QPushButton(_("Add User"))
-        add_button.clicked.connect(self.add_user)
-        self.layout.addWidget(add_button)
-
-        remove_button = QPushButton(_("Remove Selected User"))
-        remove_button.clicked.connect(self.remove_user)
-        self.layout.addWidget(remove_button)
-
-        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        buttons.accepted.connect(self.accept)
-        buttons.rejected.connect(self.reject)
-        self.layout.addWidget(buttons)
-
-    def add_user(self):
-        user = self.new_user_input.text().strip()
-        if user:
-            self.ti_users_list.addItem(user)
-            self.new_user_input.clear()
-
-    def remove_user(self):
-        current_item = self.ti_users_list.currentItem()
-        if current_item:
-            self.ti_users_list.takeItem(self.ti_users_list.row(current_item))
-
-    def get_ti_users(self):
-        return [self.ti_users_list.item(i).text() for i in range(self.ti_users_list.count())]
+    def run(self):
+        self.checked.emit(check_hosts(self.ips, self.reachability['ports'], self.reachability['timeout']))
 
 
-class AddServerDialog(QDialog):
-    def __init__(self, parent=None):
+class Sparkline(QWidget):
+    def __init__(self, color, maximum=None, parent=None):
         super().__init__(parent)
-        self.setWindowTitle(_("Add Server"))
-        self.layout = QFormLayout(self)
+        self.color = QColor(color)
+        self.maximum = maximum
+        self.values = []
+        self.setFixedHeight(24)
+        self.setMinimumWidth(60)
+
+    def set_values(self, values):
+        self.values = [value for value in values if value is not None]
+        self.update()
+
+    def paintEvent(self, event):
+        if len(self.values) < 2:
+            return
+        top = self.maximum or max(self.values) or 1
+        step = (self.width() - 2) / (len(self.values) - 1)
+        height = self.height() - 2
+        points = QPolygonF([QPointF(1 + i * step, 1 + height - min(value, top) / top * height)
+                            for i, value in enumerate(self.values)])
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(self.color, 1.5))
+        painter.drawPolyline(points)
 
-        self.name_input = QLineEdit()
-        self.ip_input = QLineEdit()
-
-        self.layout.addRow(_("Server Name:"), self.name_input)
-        self.layout.addRow(_("Server IP:"), self.ip_input)
-
-        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        buttons.accepted.connect(self.accept)
-        buttons.rejected.connect(self.reject)
-        self.layout.addWidget(buttons)
-
-    def get_server_info(self):
-        return self.name_input.text().strip(), self.ip_input.text().strip()
 
+class QwinstaWorker(QThread):
+    finished = pyqtSignal(list, list, list, object, object)
 
-class MonitorProcessesDialog(QDialog):
-    def __init__(self, processes, parent=None):
+    def __init__(self, host, reachability, counters=True, parent=None):
         super().__init__(parent)
-        self.setWindowTitle(_("Monitor Processes"))
-        self.layout = QVBoxLayout(self)
-
-        self.processes_list = QListWidget()
-        self.processes_list.addItems(processes)
-        self.layout.addWidget(self.processes_list)
-
-        self.new_process_input = QLineEdit()
-        self.layout.addWidget(self.new_process_input)
+        self.host = host
+        self.reachability = reachability
+        self.counters = counters
+        self.latency = None  # Set when a fleet-wide check already reached the host
 
-        add_button = QPushButton(_("Add Process"))
-        add_button.clicked.connect(self.add_process)
-        self.layout.addWidget(add_button)
+    def run(self):
+        latency, self.latency = self.latency, None
+        host = self.host
+        self.finished.emit(*poll_host(host.ip, host.processes, host.services, self.reachability, latency,
+                                      self.counters))
 
-        remove_button = QPushButton(_("Remove Selected Process"))
-        remove_button.clicked.connect(self.remove_process)
-        self.layout.addWidget(remove_button)
 
-        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        buttons.accepted.connect(self.accept)
-        buttons.rejected.connect(self.reject)
-        self.layout.addWidget(buttons)
+class CollectorBridge(QThread):
+    """ Hands finished snapshots from the collector processes to the GUI thread """
+    result = pyqtSignal(str, list, list, list, object, object)
 
-    def add_process(self):
-        process = self.new_process_input.text().strip()
-        if process:
-            self.processes_list.addItem(process)
-            self.new_process_input.clear()
+    def __init__(self, collector, parent=None):
+        super().__init__(parent)
+        self.collector = collector
 
-    def remove_process(self):
-        current_item = self.processes_list.currentItem()
-        if current_item:
-            self.processes_list.takeItem(self.processes_list.row(current_item))
+    def run(self):
+        while not self.isInterruptionRequested():
+            for name, users, running_processes, running_services, counters, latency in self.collector.collect(0.5):
+                self.result.emit(name, list(users), list(running_processes), list(running_services), counters,
+                                 latency)
 
-    def get_processes(self):
-        return [self.processes_list.item(i).text() for i in range(self.processes_list.count())]
 
+class AgentListener(QThread):
+    snapshot = pyqtSignal(str, str, list, list, list)
 
-class MonitorServicesDialog(QDialog):
-    def __init__(self, services, parent=None):
+    def __init__(self, hub, parent=None):
         super().__init__(parent)
-        self.setWindowTitle(_("Monitor Services"))
-        self.layout = QVBoxLayout(self)
+        self.hub = hub
 
-        self.services_list = QListWidget()
-        self.services_list.addItems(services)
-        self.layout.addWidget(self.services_list)
-
-        self.new_service_input = QLineEdit()
-        self.layout.addWidget(self.new_service_input)
-
-        add_button = QPushButton(_("Add Service"))
-        add_button.clicked.connect(self.add_service)
-        self.layout.addWidget(add_button)
-
-        remove_button = QPushButton(_("Remove Selected Service"))
-        remove_button.clicked.connect(self.remove_service)
-        self.layout.addWidget(remove_button)
+    def run(self):
+        while not self.isInterruptionRequested():
+            for agent in self.hub.serve(timeout=0.5):
+                self.snapshot.emit(agent.name, agent.peer, sorted(agent.sessions), sorted(agent.processes),
+                                   sorted(agent.services))
 
-        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        buttons.accepted.connect(self.accept)
-        buttons.rejected.connect(self.reject)
-        self.layout.addWidget(buttons)
 
-    def add_service(self):
-        service = self.new_service_input.text().strip()
-        if service:
-            self.services_list.addItem(service)
-            self.new_service_input.clear()
+class UsageReportWorker(QThread):
+    finished = pyqtSignal(object)
 
-    def remove_service(self):
-        current_item = self.services_list.currentItem()
-        if current_item:
-            self.services_list.takeItem(self.services_list.row(current_item))
+    def __init__(self, store, config, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.config = config
 
-    def get_services(self):
-        return [self.services_list.item(i).text() for i in range(self.services_list.count())]
+    def run(self):
+        import analytics
+        samples, dwells = self.store.load()
+        self.finished.emit(analytics.build_report(
+            samples, dwells, list(self.store.hosts), list(self.store.users), self.config['report_days'],
+            over_ratio=self.config['over_ratio'], under_ratio=self.config['under_ratio'],
+            persistence=self.config['persistence']))
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-
-    # Add language selection
-    language_dialog = QDialog()
-    language_dialog.setWindowTitle(_("Select Language"))
-    language_layout = QVBoxLayout(language_dialog)
-
-    language_combo = QComboBox()
-    language_combo.addItems(["English", "Português"])
-    language_layout.addWidget(language_combo)
-
-    ok_button = QPushButton(_("OK"))
-    ok_button.clicked.connect(language_dialog.accept)
-    language_layout.addWidget(ok_button)
-
-    if language_dialog.exec_() == QDialog.Accepted:
-        selected_language = 'en' if language_combo.currentText() == "English" else 'pt'
-        translator.language = selected_language
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()  # Collector processes in the PyInstaller build
+
+    milestones = None
+    if os.environ.get('SERVER_MONITOR_BENCHMARK'):
+        from startup_benchmark import Milestones
+        milestones = Milestones(os.environ['SERVER_MONITOR_BENCHMARK'])
+        milestones.mark('imported')
+
+    parser = argparse.ArgumentParser(description="Server Monitor")
+    parser.add_argument('--capture', metavar='FILE', help="append raw probe output to a compressed capture file")
+    parser.add_argument('--replay', metavar='FILE', help="answer probes from a capture file instead of the network")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="replay speed factor; 0 replays every recording as fast as possible")
+    parser.add_argument('--language', choices=['en', 'pt'], help="use this language for this session only")
+    args, qt_args = parser.parse_known_args()
+    if args.replay:
+        import capture
+        capture.replay(args.replay, args.speed)
+    elif args.capture:
+        import capture
+        capture.record(args.capture)
+
+    app = QApplication(sys.argv[:1] + qt_args)
+
+    # The language is asked for once and then remembered in the config; --language does not change it
+    language = args.language or saved_language()
+    chosen = None
+    if language is None:
+        from dialogs import LanguageDialog
+        language_dialog = LanguageDialog()
+        if language_dialog.exec_() == QDialog.Accepted:
+            language = chosen = language_dialog.get_language()
+    if language:
+        translator.language = language
 
     window = ServerMonitor()
+    if chosen:
+        window.language = chosen
+        window.save_config()
+    if milestones is not None:
+        milestones.mark('constructed')
+        milestones.watch_first_paint(app, window)
     window.show()
     sys.exit(app.exec_())
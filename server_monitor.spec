@@ -10,7 +10,15 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=[
+        # Qt modules the monitor never imports; keeps them out of the bundle
+        'PyQt5.QtNetwork', 'PyQt5.QtQml', 'PyQt5.QtQuick', 'PyQt5.QtQuickWidgets', 'PyQt5.QtSql',
+        'PyQt5.QtMultimedia', 'PyQt5.QtMultimediaWidgets', 'PyQt5.QtWebEngineCore', 'PyQt5.QtWebEngineWidgets',
+        'PyQt5.QtWebChannel', 'PyQt5.QtOpenGL', 'PyQt5.QtXml', 'PyQt5.QtXmlPatterns', 'PyQt5.QtBluetooth',
+        'PyQt5.QtDBus', 'PyQt5.QtDesigner', 'PyQt5.QtHelp', 'PyQt5.QtPositioning', 'PyQt5.QtLocation',
+        'PyQt5.QtSensors', 'PyQt5.QtSerialPort', 'PyQt5.QtNfc', 'PyQt5.QtTest', 'PyQt5.QtPrintSupport',
+        'PyQt5.Qt3DCore', 'PyQt5.QtRemoteObjects', 'tkinter',
+    ],
     noarchive=False,
     optimize=0,
 )
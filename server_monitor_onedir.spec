@@ -0,0 +1,57 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Startup-optimized build: a folder instead of a single file, so nothing is unpacked to a temp dir on
+# each launch, and no UPX, so DLLs load without being decompressed first.
+#   pyinstaller server_monitor_onedir.spec  ->  dist/server_monitor/server_monitor.exe
+
+
+a = Analysis(
+    ['server_monitor.py'],
+    pathex=[],
+    binaries=[],
+    datas=[('favicon.ico', '.'), ('icons', 'icons')],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=[
+        # Qt modules the monitor never imports; keeps them out of the bundle
+        'PyQt5.QtNetwork', 'PyQt5.QtQml', 'PyQt5.QtQuick', 'PyQt5.QtQuickWidgets', 'PyQt5.QtSql',
+        'PyQt5.QtMultimedia', 'PyQt5.QtMultimediaWidgets', 'PyQt5.QtWebEngineCore', 'PyQt5.QtWebEngineWidgets',
+        'PyQt5.QtWebChannel', 'PyQt5.QtOpenGL', 'PyQt5.QtXml', 'PyQt5.QtXmlPatterns', 'PyQt5.QtBluetooth',
+        'PyQt5.QtDBus', 'PyQt5.QtDesigner', 'PyQt5.QtHelp', 'PyQt5.QtPositioning', 'PyQt5.QtLocation',
+        'PyQt5.QtSensors', 'PyQt5.QtSerialPort', 'PyQt5.QtNfc', 'PyQt5.QtTest', 'PyQt5.QtPrintSupport',
+        'PyQt5.Qt3DCore', 'PyQt5.QtRemoteObjects', 'tkinter',
+    ],
+    noarchive=False,
+    optimize=0,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='server_monitor',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=['favicon.ico'],
+)
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='server_monitor',
+)
@@ -0,0 +1,98 @@
+# startup_benchmark.py
+""" Measure how long Server Monitor takes to start.
+
+Launches the app (or a PyInstaller build) several times with
+SERVER_MONITOR_BENCHMARK pointing at a scratch file. The app appends a
+timestamp for each milestone and quits after its first paint:
+
+    imported     all modules imported, before the QApplication exists
+    constructed  ServerMonitor.__init__ returned
+    first_paint  the main window finished painting for the first time
+
+Times are reported in ms since the process was launched, so they include
+interpreter start-up and, for a one-file build, unpacking the bundle.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ENV_VAR = 'SERVER_MONITOR_BENCHMARK'
+MILESTONES = ('imported', 'constructed', 'first_paint')
+
+
+class Milestones:
+    """ Used by server_monitor.py when ENV_VAR is set """
+
+    def __init__(self, path):
+        self.path = path
+
+    def mark(self, name):
+        with open(self.path, 'a') as f:
+            f.write(f"{name} {time.time()}\n")
+
+    def watch_first_paint(self, app, window):
+        from PyQt5.QtCore import QObject, QEvent, QTimer
+
+        def finished():
+            self.mark('first_paint')
+            app.quit()
+
+        class FirstPaint(QObject):
+            def eventFilter(self, watched, event):
+                if event.type() == QEvent.Paint:
+                    watched.removeEventFilter(self)
+                    # Runs once the whole window, children included, has been painted
+                    QTimer.singleShot(0, finished)
+                return False
+
+        self.first_paint = FirstPaint(window)
+        window.installEventFilter(self.first_paint)
+
+
+def run_once(command, cwd):
+    fd, path = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+    try:
+        env = dict(os.environ, **{ENV_VAR: path})
+        launched = time.time()
+        try:
+            subprocess.run(command, cwd=cwd, env=env, timeout=120, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+        except subprocess.TimeoutExpired:
+            pass  # Report the milestones reached before it hung; the rest show as "not reached"
+        with open(path) as f:
+            marks = dict(line.split() for line in f if line.strip())
+        return {name: (float(marks[name]) - launched) * 1000 for name in MILESTONES if name in marks}
+    finally:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server Monitor startup benchmark")
+    parser.add_argument('--exe', help="benchmark a built executable instead of server_monitor.py")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--cwd', default='.', help="directory holding the server_config.json to start with")
+    args = parser.parse_args()
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server_monitor.py')
+    command = [os.path.abspath(args.exe)] if args.exe else [sys.executable, script]
+    command += ['--language', 'en']  # Never stop at the language dialog
+
+    runs = [run_once(command, args.cwd) for _ in range(args.runs)]
+    print(f"{' '.join(command)} ({args.runs} runs, ms since launch)")
+    for name in MILESTONES:
+        values = [run[name] for run in runs if name in run]
+        if values:
+            print(f"  {name:<12} median {statistics.median(values):8.1f}   min {min(values):8.1f}   "
+                  f"max {max(values):8.1f}")
+        else:
+            print(f"  {name:<12} not reached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import socket
+import time
+import unittest
+from unittest import mock
+
+from agent import encode
+from agent_hub import AgentHub
+
+TOKEN = 's3cret'
+
+
+class AgentHubTest(unittest.TestCase):
+    def setUp(self):
+        self.hub = AgentHub('127.0.0.1', 0, TOKEN, stale_after=30)
+        self.hub.start()
+        self.sockets = []
+
+    def tearDown(self):
+        for sock in self.sockets:
+            sock.close()
+        self.hub.close()
+
+    def connect(self):
+        sock = socket.create_connection(('127.0.0.1', self.hub.port), timeout=5)
+        self.sockets.append(sock)
+        return sock
+
+    def serve(self, seconds=0.5):
+        """ Run the hub's loop for a while and return the names of the hosts that changed """
+        changed = set()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            changed.update(agent.name for agent in self.hub.serve(0.05))
+        return changed
+
+    def hello(self, sock, name, token=TOKEN, **fields):
+        sock.sendall(encode({'type': 'hello', 'host': name, 'seq': 1, 'token': token, **fields}))
+
+    def is_closed(self, sock):
+        sock.settimeout(2)
+        try:
+            return sock.recv(1) == b''
+        except ConnectionResetError:
+            return True
+
+    def test_requires_a_token(self):
+        with self.assertRaises(ValueError):
+            AgentHub('127.0.0.1', 0, None).start()
+
+    def test_hello_and_changes(self):
+        sock = self.connect()
+        self.hello(sock, 'srv1', sessions=['alice'], services=['Spooler'])
+        self.assertEqual(self.serve(), {'srv1'})
+        agent = self.hub.agents['srv1']
+        self.assertEqual(agent.sessions, {'alice'})
+        self.assertEqual(agent.peer, '127.0.0.1')
+        self.assertTrue(self.hub.is_live('srv1'))
+
+        sock.sendall(encode({'type': 'change', 'host': 'srv1', 'seq': 2, 'added': {'sessions': ['bob']},
+                             'removed': {'services': ['Spooler']}}))
+        self.assertEqual(self.serve(), {'srv1'})
+        self.assertEqual(agent.sessions, {'alice', 'bob'})
+        self.assertEqual(agent.services, set())
+        self.assertEqual(agent.seq, 2)
+
+        sock.sendall(encode({'type': 'heartbeat', 'host': 'srv1', 'seq': 3}))
+        self.assertEqual(self.serve(), set())
+        self.assertEqual(agent.seq, 3)
+
+    def test_wrong_token_is_disconnected(self):
+        sock = self.connect()
+        self.hello(sock, 'srv1', token='guess')
+        self.serve()
+        self.assertNotIn('srv1', self.hub.agents)
+        self.assertTrue(self.is_closed(sock))
+
+    def test_change_without_hello_is_disconnected(self):
+        sock = self.connect()
+        sock.sendall(encode({'type': 'change', 'host': 'srv1', 'seq': 1, 'added': {'sessions': ['mallory']}}))
+        self.serve()
+        self.assertNotIn('srv1', self.hub.agents)
+        self.assertTrue(self.is_closed(sock))
+
+    def test_name_held_by_live_connection_is_refused(self):
+        first = self.connect()
+        self.hello(first, 'srv1', sessions=['alice'])
+        self.serve()
+        second = self.connect()
+        self.hello(second, 'srv1', sessions=['mallory'])
+        self.serve()
+        self.assertEqual(self.hub.agents['srv1'].sessions, {'alice'})
+        self.assertTrue(self.is_closed(second))
+
+        # Once the owner disconnects the name is free again, and the host falls back to polling meanwhile
+        first.close()
+        self.serve()
+        self.assertFalse(self.hub.is_live('srv1'))
+        third = self.connect()
+        self.hello(third, 'srv1', sessions=['carol'])
+        self.assertEqual(self.serve(), {'srv1'})
+        self.assertEqual(self.hub.agents['srv1'].sessions, {'carol'})
+
+    def test_non_object_messages_are_disconnected(self):
+        for line in (b'[]\n', b'1\n', b'"srv1"\n', b'null\n'):
+            sock = self.connect()
+            sock.sendall(line)
+            self.assertEqual(self.serve(), set())
+            self.assertTrue(self.is_closed(sock), line)
+
+    def test_malformed_fields_are_disconnected(self):
+        messages = [
+            {'type': 'hello', 'host': ['srv1'], 'token': TOKEN},
+            {'type': 'hello', 'host': 7, 'token': TOKEN},
+            {'type': 'hello', 'host': 'srv1', 'token': TOKEN, 'sessions': 'alice'},
+            {'type': 'hello', 'host': 'srv1', 'token': TOKEN, 'sessions': [1, 2]},
+            {'type': 'change', 'host': 'srv1', 'added': ['sessions']},
+            {'type': 'change', 'host': 'srv1', 'removed': {'services': 'Spooler'}},
+            {'type': 'change', 'host': 'srv1', 'added': {'sessions': [None]}},
+        ]
+        for message in messages:
+            # Authenticate first so the bad message reaches the field handling
+            sock = self.connect()
+            self.hello(sock, 'srv1', sessions=['alice'])
+            self.serve()
+            sock.sendall(encode(message))
+            self.serve()
+            self.assertTrue(self.is_closed(sock), message)
+            self.assertEqual(self.hub.agents['srv1'].sessions, {'alice'})
+            self.assertNotIn('srv1', self.hub.connections)
+
+    def test_unexpected_error_drops_only_that_connection(self):
+        good = self.connect()
+        self.hello(good, 'srv1', sessions=['alice'])
+        self.serve()
+        bad = self.connect()
+        with mock.patch.object(self.hub, '_apply', side_effect=RuntimeError('boom')), self.assertLogs('agent_hub'):
+            self.hello(bad, 'srv2')
+            self.serve()
+        self.assertTrue(self.is_closed(bad))
+
+        good.sendall(encode({'type': 'change', 'host': 'srv1', 'seq': 2, 'added': {'sessions': ['bob']}}))
+        self.assertEqual(self.serve(), {'srv1'})
+        self.assertEqual(self.hub.agents['srv1'].sessions, {'alice', 'bob'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+from unittest import mock
+
+import alerts
+from alerts import AlertEngine, IT_USER, SERVICE_DOWN, SESSIONS_ABOVE, HOST_UNREACHABLE
+
+
+class ListSink:
+    def __init__(self):
+        self.alerts = []
+
+    def emit(self, alert):
+        self.alerts.append(alert)
+
+
+class FailingSink:
+    def emit(self, alert):
+        raise RuntimeError("sink down")
+
+
+class AlertEngineTest(unittest.TestCase):
+    def engine(self, rules, ti_users=(), cooldown=600):
+        self.sink = ListSink()
+        return AlertEngine(rules, ti_users, [self.sink], cooldown)
+
+    def kinds(self, raised):
+        return [alert.kind for alert in raised]
+
+    def test_it_user_is_case_insensitive_and_raised_once(self):
+        engine = self.engine([{'type': IT_USER}], ['Admin'])
+        self.assertEqual(self.kinds(engine.observe('h', ['admin', 'joe'], [], [], True, now=0)), [IT_USER])
+        self.assertEqual(engine.observe('h', ['admin'], [], [], True, now=60), [])
+        self.assertEqual(len(engine.active_alerts('h')), 1)
+        engine.observe('h', ['joe'], [], [], True, now=120)
+        self.assertEqual(engine.active_alerts('h'), [])
+
+    def test_sessions_above_fires_only_over_max(self):
+        engine = self.engine([{'type': SESSIONS_ABOVE, 'max': 2}])
+        self.assertEqual(engine.observe('h', ['a', 'b'], [], [], True, now=0), [])
+        self.assertEqual(self.kinds(engine.observe('h', ['a', 'b', 'c'], [], [], True, now=1)), [SESSIONS_ABOVE])
+
+    def test_host_unreachable_after_at_least_n_minutes(self):
+        engine = self.engine([{'type': HOST_UNREACHABLE, 'minutes': 5}])
+        self.assertEqual(engine.observe('h', None, [], [], False, now=0), [])
+        self.assertEqual(engine.observe('h', None, [], [], False, now=299), [])
+        self.assertEqual(self.kinds(engine.observe('h', None, [], [], False, now=300)), [HOST_UNREACHABLE])
+        # A probe error means the host answered: the outage ends
+        self.assertEqual(engine.observe('h', None, [], [], True, now=400), [])
+        self.assertEqual(engine.active_alerts('h'), [])
+        self.assertEqual(engine.observe('h', None, [], [], False, now=500), [])
+
+    def test_probe_error_keeps_last_sessions(self):
+        engine = self.engine([{'type': IT_USER}], ['admin'])
+        engine.observe('h', ['admin'], [], [], True, now=0)
+        engine.observe('h', None, [], [], True, now=60)
+        self.assertEqual(self.kinds(engine.active_alerts('h')), [IT_USER])
+
+    def test_service_down_counts_consecutive_polls(self):
+        engine = self.engine([{'type': SERVICE_DOWN, 'service': 'Spooler', 'polls': 2}])
+        for now in (0, 1):
+            self.assertEqual(engine.observe('h', [], ['Spooler'], [], True, now=now), [])
+        self.assertEqual(self.kinds(engine.observe('h', [], ['Spooler'], [], True, now=2)), [SERVICE_DOWN])
+        engine.observe('h', [], ['Spooler'], ['Spooler'], True, now=3)
+        self.assertEqual(engine.active_alerts('h'), [])
+        self.assertEqual(engine.observe('h', [], ['Spooler'], [], True, now=4), [])
+
+    def test_rule_hosts(self):
+        engine = self.engine([{'type': SESSIONS_ABOVE, 'max': 0, 'hosts': ['a']}])
+        self.assertEqual(engine.observe('b', ['x'], [], [], True, now=0), [])
+        self.assertEqual(len(engine.observe('a', ['x'], [], [], True, now=0)), 1)
+
+    def test_cooldown(self):
+        engine = self.engine([{'type': IT_USER}], ['admin'], cooldown=600)
+        engine.observe('h', ['admin'], [], [], True, now=0)
+        engine.observe('h', [], [], [], True, now=10)
+        engine.observe('h', ['admin'], [], [], True, now=599)
+        self.assertEqual(len(self.sink.alerts), 1)
+        engine.observe('h', [], [], [], True, now=700)
+        engine.observe('h', ['admin'], [], [], True, now=800)
+        self.assertEqual(len(self.sink.alerts), 2)
+
+    def test_cooldown_entries_are_pruned_and_forgotten(self):
+        engine = self.engine([{'type': IT_USER}], ['admin'], cooldown=100)
+        engine.observe('a', ['admin'], [], [], True, now=0)
+        engine.observe('b', ['admin'], [], [], True, now=150)
+        self.assertEqual({key[1] for key in engine.last_notified}, {'b'})
+        engine.forget('b')
+        self.assertEqual(engine.last_notified, {})
+        self.assertEqual(engine.active_alerts('b'), [])
+
+    def test_token_bucket_limits_notifications(self):
+        with mock.patch('alerts.time.monotonic', return_value=1000.0):  # No refill during the burst
+            engine = self.engine([{'type': IT_USER}], ['admin'])
+            for host in range(alerts.MAX_NOTIFICATIONS_PER_MINUTE + 5):
+                engine.observe(f"h{host}", ['admin'], [], [], True, now=0)
+        self.assertEqual(len(self.sink.alerts), alerts.MAX_NOTIFICATIONS_PER_MINUTE)
+        self.assertEqual(engine.suppressed, 5)
+
+    def test_failing_sink_is_counted(self):
+        engine = AlertEngine([{'type': IT_USER}], ['admin'], [FailingSink()])
+        with self.assertLogs('alerts', 'ERROR'):
+            engine.observe('h', ['admin'], [], [], True, now=0)
+        self.assertEqual(engine.sink_failures, 1)
+
+    def test_recheck_after_rules_change(self):
+        engine = self.engine([{'type': IT_USER}], [])
+        engine.observe('h', ['admin'], [], [], True, now=0)
+        self.assertEqual(engine.active_alerts('h'), [])
+        engine.compile([{'type': IT_USER}], ['admin'])
+        self.assertEqual(self.kinds(engine.recheck('h', now=1)), [IT_USER])
+
+
+if __name__ == '__main__':
+    unittest.main()
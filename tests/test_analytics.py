@@ -0,0 +1,133 @@
+import math
+import random
+import shutil
+import tempfile
+import unittest
+
+import analytics
+
+MONDAY = 4 * 1440  # 1970-01-05 00:00 UTC, in minutes
+
+
+def make_samples(rows):
+    """ (minute, host, sessions) tuples as a samples array """
+    samples = analytics.np.zeros(len(rows), dtype=analytics.SAMPLE_DTYPE)
+    for idx, row in enumerate(sorted(rows)):
+        samples[idx] = row
+    return samples
+
+
+@unittest.skipUnless(analytics.has_numpy(), "NumPy is not installed")
+class ReportTest(unittest.TestCase):
+    def setUp(self):
+        analytics._load_numpy()
+        self.np = analytics.np
+        self.dwells = self.np.zeros(0, dtype=analytics.DWELL_DTYPE)
+
+    def report(self, rows, hosts=('a', 'b'), **options):
+        return analytics.build_report(make_samples(rows), self.dwells, list(hosts), [], utc_offset=0, **options)
+
+    def test_group_stats_match_nearest_rank(self):
+        rng = random.Random(7)
+        groups, values = [], []
+        for group in (0, 1, 3):  # Group 2 has no samples
+            for _ in range(rng.randint(1, 300)):
+                groups.append(group)
+                values.append(rng.randint(0, 60))
+        counts, peak, p95, mean = analytics._group_stats(self.np.array(groups), self.np.array(values), 4)
+        for group in range(4):
+            members = sorted(value for value, owner in zip(values, groups) if owner == group)
+            self.assertEqual(counts[group], len(members))
+            if not members:
+                self.assertEqual((peak[group], p95[group], mean[group]), (0, 0, 0))
+                continue
+            self.assertEqual(peak[group], members[-1])
+            self.assertEqual(p95[group], members[math.ceil(len(members) * 0.95) - 1])
+            self.assertAlmostEqual(mean[group], sum(members) / len(members))
+
+    def test_p95_ignores_the_top_five_percent(self):
+        rows = [(MONDAY + idx, 0, 100 if idx < 5 else 10) for idx in range(100)]
+        host = self.report(rows, hosts=('a',))['hosts'][0]
+        self.assertEqual((host['samples'], host['peak'], host['p95'], host['mean']), (100, 100, 10, 14.5))
+
+    def test_fleet_totals_carry_slower_hosts_forward(self):
+        # a is polled every minute and b every 5 minutes, both with 10 sessions
+        rows = [(MONDAY + idx, 0, 10) for idx in range(60)]
+        rows += [(MONDAY + idx, 1, 10) for idx in range(0, 60, 5)]
+        report = self.report(rows)
+        self.assertEqual(report['hour_of_week'], [
+            {'day': 0, 'hour': 0, 'samples': 60, 'peak': 20, 'p95': 20, 'mean': 20.0}])
+        # Per-host figures still only use real samples
+        self.assertEqual([(host['host'], host['samples']) for host in report['hosts']], [('a', 60), ('b', 12)])
+
+    def test_carry_stops_after_carry_minutes(self):
+        # b's only sample counts for itself and the next 4 minutes
+        rows = [(MONDAY + idx, 0, 10) for idx in range(60)] + [(MONDAY, 1, 10)]
+        row, = self.report(rows, carry_minutes=4)['hour_of_week']
+        self.assertEqual((row['samples'], row['peak'], row['p95']), (60, 20, 20))
+        self.assertAlmostEqual(row['mean'], (5 * 20 + 55 * 10) / 60, places=2)
+
+    def test_carry_does_not_cross_hosts_or_the_end(self):
+        # b is host 1 of 2 and has the last sample: nothing is carried past it or into another host's row
+        rows = [(MONDAY, 0, 3), (MONDAY + 59, 1, 5)]
+        row, = self.report(rows)['hour_of_week']
+        self.assertEqual(row['samples'], 12)  # a's minute and the 10 after it, then b's
+        self.assertEqual((row['peak'], row['mean']), (5, round((11 * 3 + 5) / 12, 2)))
+
+    def test_matches_brute_force_carry(self):
+        rng = random.Random(3)
+        rows = []
+        for host, every in enumerate((1, 2, 5, 15)):
+            for minute in range(MONDAY, MONDAY + 600, every):
+                if rng.random() < 0.9:
+                    rows.append((minute, host, rng.randint(0, 30)))
+        carry = 6
+        last = {}
+        totals = {}
+        for minute in range(MONDAY, max(row[0] for row in rows) + 1):
+            for row in rows:
+                if row[0] == minute:
+                    last[row[1]] = row
+            counted = [row[2] for row in last.values() if minute - row[0] <= carry]
+            if counted:
+                totals.setdefault(minute // 60 % 24, []).append(sum(counted))
+        report = self.report(rows, hosts='abcd', carry_minutes=carry)['hour_of_week']
+        self.assertEqual(len(report), len(totals))
+        for row in report:
+            expected = sorted(totals[row['hour']])
+            self.assertEqual(row['samples'], len(expected))
+            self.assertEqual(row['peak'], expected[-1])
+            self.assertEqual(row['p95'], expected[math.ceil(len(expected) * 0.95) - 1])
+            self.assertAlmostEqual(row['mean'], sum(expected) / len(expected), places=2)
+
+
+@unittest.skipUnless(analytics.has_numpy(), "NumPy is not installed")
+class SessionStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_keeps_the_highest_count_per_minute_and_records_dwell(self):
+        store = analytics.SessionStore(self.path)
+        store.observe('srv', ['alice', 'bob'], now=MONDAY * 60)
+        store.observe('srv', ['alice', 'bob'], now=MONDAY * 60 + 30)
+        store.observe('srv', ['alice'], now=MONDAY * 60 + 300)
+        store.flush(now=MONDAY * 60 + 300, final=True)
+        samples, dwells = analytics.SessionStore(self.path).load()
+        self.assertEqual(samples.tolist(), [(MONDAY, 0, 2), (MONDAY + 5, 0, 1)])
+        self.assertEqual(dwells.tolist(), [(MONDAY, MONDAY + 5, 0, 1)])
+
+    def test_prune_drops_records_older_than_retention(self):
+        store = analytics.SessionStore(self.path, retention_days=1)
+        for day in range(3):
+            store.observe('srv', ['alice'], now=(MONDAY + day * 1440) * 60)
+        store.flush(now=(MONDAY + 2 * 1440) * 60, final=True)
+        store.prune(now=(MONDAY + 2 * 1440) * 60)
+        samples, _ = store.load()
+        self.assertEqual(samples['minute'].tolist(), [MONDAY + 1440, MONDAY + 2 * 1440])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import time
+import unittest
+from collections import Counter
+from unittest import mock
+
+import collector
+from collector import HashRing, ShardedCollector, SHARD_LOST
+
+REACHABILITY = {'enabled': False, 'ports': [], 'timeout': 0.1}
+
+
+class HashRingTest(unittest.TestCase):
+    def test_empty_ring(self):
+        self.assertIsNone(HashRing().node_for('h0'))
+
+    def test_spreads_and_is_stable(self):
+        ring = HashRing(range(4))
+        hosts = [f"h{i}" for i in range(2000)]
+        owners = {host: ring.node_for(host) for host in hosts}
+        self.assertEqual(owners, {host: ring.node_for(host) for host in hosts})
+        counts = Counter(owners.values())
+        self.assertEqual(set(counts), {0, 1, 2, 3})
+        self.assertGreater(min(counts.values()), 2000 / 4 / 2)
+
+    def test_losing_a_node_only_moves_its_hosts(self):
+        ring = HashRing(range(4))
+        hosts = [f"h{i}" for i in range(2000)]
+        before = {host: ring.node_for(host) for host in hosts}
+        ring.remove_node(2)
+        for host in hosts:
+            if before[host] != 2:
+                self.assertEqual(ring.node_for(host), before[host])
+            else:
+                self.assertNotEqual(ring.node_for(host), 2)
+        ring.add_node(2)
+        self.assertEqual(before, {host: ring.node_for(host) for host in hosts})
+
+
+def fake_poll_host(ip, processes, services, reachability, latency, counters):
+    time.sleep(0.2)
+    return ['user'], [], [], None, latency
+
+
+class ShardLossTest(unittest.TestCase):
+    def setUp(self):
+        # Forked shards inherit the patched probe, so nothing is run on the machine
+        patcher = mock.patch.object(collector, 'poll_host', fake_poll_host)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.collector = ShardedCollector(REACHABILITY, workers=2, threads=2)
+        self.addCleanup(self.collector.close)
+
+    def collect(self, names, seconds=5):
+        results = {}
+        deadline = time.monotonic() + seconds
+        while set(names) - set(results) and time.monotonic() < deadline:
+            for result in self.collector.collect(0.1):
+                results[result[0]] = result[1]
+        return results
+
+    def drain(self, seconds):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            self.collector.collect(0.1)
+
+    def kill_all(self):
+        for process, commands, results in list(self.collector.shards.values()):
+            process.kill()
+            process.join()
+
+    def test_in_flight_polls_fail_and_shards_come_back(self):
+        self.assertTrue(self.collector.poll('h0', '10.0.0.1', [], []))
+        self.kill_all()
+        self.assertEqual(self.collect(['h0']), {'h0': (SHARD_LOST,)})
+        self.assertEqual(len(self.collector.shards), 2)
+        self.assertTrue(self.collector.poll('h0', '10.0.0.1', [], []))
+        self.assertEqual(self.collect(['h0']), {'h0': ('user',)})
+
+    def test_poll_is_refused_while_shards_wait_to_restart(self):
+        self.kill_all()
+        self.drain(0.3)
+        self.kill_all()  # Second death within RESPAWN_DELAY: not restarted yet
+        self.drain(0.3)
+        self.assertEqual(self.collector.shards, {})
+        self.assertFalse(self.collector.poll('h0', '10.0.0.1', [], []))
+        self.assertEqual(self.collector.pending, {})
+        with mock.patch.object(collector, 'RESPAWN_DELAY', 0):
+            self.assertTrue(self.collector.poll('h0', '10.0.0.1', [], []))
+        self.assertEqual(self.collect(['h0']), {'h0': ('user',)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import events
+from events import Event, EventLog, poll_events, snapshot
+from host_state import HostState
+
+
+class PollEventsTest(unittest.TestCase):
+    def setUp(self):
+        self.host = HostState('srv', '10.0.0.1', processes=['app.exe'], services=['Spooler'])
+
+    def poll(self, users, processes=(), services=(), duration=None, slow_after=None):
+        before = snapshot(self.host)
+        self.host.apply_result(users, processes, services)
+        return [(event.kind, event.subject) for event in poll_events('srv', before, self.host, duration, slow_after)]
+
+    def test_first_poll_reports_nothing(self):
+        self.assertEqual(self.poll(['alice'], ['app.exe'], ['Spooler']), [])
+
+    def test_logons_logoffs_and_watched_items(self):
+        self.poll(['alice'], ['app.exe'], [])
+        self.assertEqual(self.poll(['bob', 'carol'], [], ['Spooler', 'Unwatched']), [
+            (events.LOGON, 'bob'), (events.LOGON, 'carol'), (events.LOGOFF, 'alice'),
+            (events.SERVICE_STARTED, 'Spooler'), (events.PROCESS_STOPPED, 'app.exe')])
+
+    def test_errors_timeouts_and_recovery(self):
+        self.poll(['alice'])
+        self.assertEqual(self.poll(['Error: access denied']), [(events.PROBE_ERROR, None)])
+        self.assertEqual(self.poll(['Error: access denied']), [])  # Same error again
+        self.assertEqual(self.poll(['Error: timed out']), [(events.PROBE_ERROR, None)])
+        self.assertEqual(self.poll(['No server response.']), [(events.TIMEOUT, None)])
+        self.assertEqual(self.poll(['No server response.']), [])
+        # Recovery does not also report every user as a logon
+        self.assertEqual(self.poll(['alice', 'bob']), [(events.RECOVERED, None)])
+
+    def test_slow_poll(self):
+        self.assertEqual(self.poll([], duration=2.0, slow_after=5), [])
+        self.assertEqual(self.poll([], duration=6.0, slow_after=5), [(events.SLOW_POLL, None)])
+        self.assertEqual(self.poll([], duration=6.0, slow_after=0), [])
+
+
+class EventLogTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def read(self, name):
+        with open(os.path.join(self.path, name), encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_ring_filters_and_file(self):
+        log = EventLog(self.path, capacity=3, flush_interval=60)
+        received = []
+        log.subscribe(received.append)
+        for idx in range(5):
+            log.emit(Event(events.LOGON, f'srv{idx}', 'alice' if idx % 2 else 'bob', when=1000 + idx))
+        log.close()
+        self.assertEqual([event.host for event in log.recent()], ['srv2', 'srv3', 'srv4'])
+        self.assertEqual([event.host for event in log.recent(text='ALICE')], ['srv3'])
+        self.assertEqual(log.recent({events.LOGOFF}), [])
+        self.assertEqual(len(received), 5)
+        # The file keeps everything the ring has dropped
+        self.assertEqual([row['host'] for row in self.read(events.LOG_FILE)], [f'srv{idx}' for idx in range(5)])
+
+    def test_rotation_keeps_backups(self):
+        log = EventLog(self.path, max_bytes=200, backups=2, flush_interval=60)
+        log.close()
+        for idx in range(4):
+            # Each batch is over max_bytes, so every write rotates
+            log._write([Event(events.TIMEOUT, f'batch{idx}', message='x' * 200)])
+        self.assertEqual(sorted(os.listdir(self.path)), ['events.1.jsonl', 'events.2.jsonl'])
+        self.assertEqual(self.read('events.1.jsonl')[0]['host'], 'batch3')
+        self.assertEqual(self.read('events.2.jsonl')[0]['host'], 'batch2')
+
+        log._write([Event(events.RECOVERED, 'small')])
+        self.assertEqual(self.read(events.LOG_FILE)[0]['host'], 'small')
+
+    def test_rotation_without_backups_starts_over(self):
+        log = EventLog(self.path, max_bytes=200, backups=0, flush_interval=60)
+        log.close()
+        log._write([Event(events.TIMEOUT, 'big', message='x' * 200)])
+        self.assertEqual(os.listdir(self.path), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from groups import UNGROUPED, Group, build_groups, summarize
+from host_state import ERROR, OFFLINE, ONLINE, Fleet, HostState
+
+
+def fleet(*groups):
+    return Fleet([HostState(f'srv{idx}', f'10.0.0.{idx}', group=group) for idx, group in enumerate(groups)])
+
+
+class GroupTest(unittest.TestCase):
+    def test_poll_interval(self):
+        self.assertEqual(Group('a', 'critical').poll_interval(), 15)
+        self.assertEqual(Group('a', 'critical', collapsed=True).poll_interval(), 300)
+        self.assertEqual(Group('a', interval=600, collapsed=True).poll_interval(), 600)
+        self.assertTrue(Group('a', 'low').collapsed)
+        self.assertEqual(Group('a', 'bogus').priority, 'normal')
+
+    def test_config_round_trip(self):
+        group = Group('a', 'critical', interval=30, collapsed_interval=120, collapsed=True)
+        copy = Group.from_config('a', group.to_config())
+        self.assertEqual(copy.to_config(), group.to_config())
+        self.assertTrue(copy.is_customized())
+        self.assertFalse(Group.from_config('b', Group('b').to_config()).is_customized())
+
+
+class BuildGroupsTest(unittest.TestCase):
+    def test_order(self):
+        specs = {'web': {'priority': 'critical'}, 'db': {}}
+        groups = build_groups(specs, fleet('', 'db', 'batch', 'web'))
+        self.assertEqual(list(groups), ['web', 'db', 'batch', UNGROUPED])
+        self.assertEqual(groups['web'].priority, 'critical')
+
+    def test_empty_default_groups_are_dropped(self):
+        groups = build_groups({}, fleet('batch', 'web'))
+        groups['web'].collapsed = True  # Changed by the user
+        specs = {name: group.to_config() for name, group in groups.items()}
+        # Both lose their last server: only the group the user changed survives
+        self.assertEqual(list(build_groups(specs, fleet(''))), ['web', UNGROUPED])
+
+    def test_empty_fleet_keeps_one_group(self):
+        self.assertEqual(list(build_groups({'old': {}}, fleet())), [UNGROUPED])
+
+
+class SummarizeTest(unittest.TestCase):
+    def test_counts(self):
+        hosts = list(fleet('', '', '', ''))
+        hosts[0].apply_result(['alice', 'bob'], [], [])
+        hosts[1].apply_result(['No server response.'], [], [])
+        hosts[2].apply_result(['Error: denied'], [], [])
+        self.assertEqual(summarize(hosts), {'servers': 4, ONLINE: 1, OFFLINE: 1, ERROR: 1, 'sessions': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
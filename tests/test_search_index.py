@@ -0,0 +1,65 @@
+import unittest
+
+from search_index import FleetIndex, value_terms, NAME, IP, USER, PROCESS, STATE
+
+
+class FleetIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = FleetIndex()
+        self.index.update_host('SRV-01', **{NAME: ['SRV-01'], IP: ['10.0.0.1'], PROCESS: ['explorer.exe']})
+        self.index.update_host('SRV-02', **{NAME: ['SRV-02'], IP: ['10.0.0.2'], PROCESS: ['AD Cloud']})
+        self.index.update_host('SRV-01', **{USER: ['alice', 'bob'], STATE: ['online']})
+        self.index.update_host('SRV-02', **{USER: ['albert'], STATE: ['unreachable']})
+
+    def test_value_terms(self):
+        self.assertEqual(value_terms(' AD Cloud '), {'ad cloud', 'ad', 'cloud'})
+        self.assertEqual(value_terms(''), set())
+
+    def test_empty_query(self):
+        self.assertIsNone(self.index.search('  '))
+
+    def test_prefix_and_case(self):
+        self.assertEqual(self.index.search('AL'), {'SRV-01', 'SRV-02'})
+        self.assertEqual(self.index.search('alic'), {'SRV-01'})
+        self.assertEqual(self.index.search('10.0.0.2'), {'SRV-02'})
+        self.assertEqual(self.index.search('zzz'), set())
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.index.search('srv al'), {'SRV-01', 'SRV-02'})
+        self.assertEqual(self.index.search('srv bob'), {'SRV-01'})
+        self.assertEqual(self.index.search('bob cloud'), set())
+
+    def test_whole_query_before_words(self):
+        self.assertEqual(self.index.search('ad cloud'), {'SRV-02'})
+        self.assertEqual(self.index.matched_terms('SRV-02', 'ad cloud'), {(PROCESS, 'ad cloud')})
+
+    def test_matched_terms(self):
+        self.assertEqual(self.index.matched_terms('SRV-01', 'srv-01 al'),
+                         {(NAME, 'srv-01'), (NAME, 'srv'), (NAME, '01'), (USER, 'alice')})
+        self.assertEqual(self.index.matched_terms('SRV-02', 'unreach'), {(STATE, 'unreachable')})
+
+    def test_updates_and_removal(self):
+        self.index.update_host('SRV-01', **{USER: ['carol']})
+        self.assertEqual(self.index.search('bob'), set())
+        self.assertEqual(self.index.search('car'), {'SRV-01'})
+        self.index.remove_host('SRV-02')
+        self.assertEqual(self.index.search('al'), set())
+        self.assertEqual(self.index.search('s'), {'SRV-01'})
+        self.index.remove_host('SRV-01')
+        self.assertEqual((self.index.postings, self.index.sorted_terms, self.index.short_prefixes), ({}, [], {}))
+
+    def test_broad_and_narrow_words_agree(self):
+        index = FleetIndex()
+        for host in range(200):
+            name = f"srv-{host:03d}"
+            index.update_host(name, **{NAME: [name], USER: [f"user{(host * 7 + i) % 500}" for i in range(20)]})
+        for query in ('u', 'user', 'user1', 'user12', 'srv-001 user', 'user12 srv', 's user49'):
+            words = query.split()
+            expected = {name for name, fields in index.host_fields.items()
+                        if all(any(term.startswith(word) for terms in fields.values() for term in terms)
+                               for word in words)}
+            self.assertEqual(index.search(query), expected, query)
+
+
+if __name__ == '__main__':
+    unittest.main()
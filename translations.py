@@ -15,16 +15,24 @@ translations = {
         'OK': 'OK',
         'Search:': 'Search:',
         'Type to search servers...': 'Type to search servers...',
+        'Search servers, IPs, users, processes, states...': 'Search servers, IPs, users, processes, states...',
         'Last update:': 'Last update:',
         'Next:': 'Next:',
         'Connected IT:': 'Connected IT:',
         'Monitored Processes:': 'Monitored Processes:',
         'Monitored Services:': 'Monitored Services:',
         'Update': 'Update',
+        'Shift+click to bypass recent results': 'Shift+click to bypass recent results',
         'Delete': 'Delete',
         'Processes': 'Processes',
         'Services': 'Services',
         'IT detected:': 'IT detected:',
+        'Unreachable': 'Unreachable',
+        'Agent': 'Agent',
+        'CPU': 'CPU',
+        'Free memory': 'Free memory',
+        'Disk queue': 'Disk queue',
+        'Working set:': 'Working set:',
         'Confirm Deletion': 'Confirm Deletion',
         'Are you sure you want to delete the server': 'Are you sure you want to delete the server',
         'Configure IT Users': 'Configure IT Users',
@@ -39,6 +47,68 @@ translations = {
         'Monitor Services': 'Monitor Services',
         'Add Service': 'Add Service',
         'Remove Selected Service': 'Remove Selected Service',
+        'Usage Report': 'Usage Report',
+        'Install NumPy to build usage reports.': 'Install NumPy to build usage reports.',
+        'No session data recorded yet.': 'No session data recorded yet.',
+        'Over-used': 'Over-used',
+        'Under-used': 'Under-used',
+        'Servers': 'Servers',
+        'Server': 'Server',
+        'Samples': 'Samples',
+        'Peak': 'Peak',
+        'P95': 'P95',
+        'Mean': 'Mean',
+        'Busiest hour': 'Busiest hour',
+        'Mean session (min)': 'Mean session (min)',
+        'Usage': 'Usage',
+        'Hour of week': 'Hour of week',
+        'Hour': 'Hour',
+        'Users': 'Users',
+        'User': 'User',
+        'Sessions': 'Sessions',
+        'Total hours': 'Total hours',
+        'Median session (min)': 'Median session (min)',
+        'Export CSV': 'Export CSV',
+        'Mon': 'Mon',
+        'Tue': 'Tue',
+        'Wed': 'Wed',
+        'Thu': 'Thu',
+        'Fri': 'Fri',
+        'Sat': 'Sat',
+        'Sun': 'Sun',
+        'Events': 'Events',
+        'Event Log': 'Event Log',
+        'All events': 'All events',
+        'Filter by server, user, service or message...': 'Filter by server, user, service or message...',
+        'Time': 'Time',
+        'Event': 'Event',
+        'Subject': 'Subject',
+        'Details': 'Details',
+        'Logon': 'Logon',
+        'Logoff': 'Logoff',
+        'Service started': 'Service started',
+        'Service stopped': 'Service stopped',
+        'Process started': 'Process started',
+        'Process stopped': 'Process stopped',
+        'Probe error': 'Probe error',
+        'Timeout': 'Timeout',
+        'Recovered': 'Recovered',
+        'Slow poll': 'Slow poll',
+        'Group:': 'Group:',
+        'Ungrouped': 'Ungrouped',
+        'Expand': 'Expand',
+        'Collapse': 'Collapse',
+        'critical': 'critical',
+        'normal': 'normal',
+        'low': 'low',
+        'every': 'every',
+        'servers': 'servers',
+        'online': 'online',
+        'unreachable': 'unreachable',
+        'errors': 'errors',
+        'sessions': 'sessions',
+        'matches': 'matches',
+        'A server with this name already exists.': 'A server with this name already exists.',
     },
     'pt': {
         'RDP Server Monitor': 'Monitor de Servidores RDP',
@@ -54,16 +124,24 @@ translations = {
         'OK': 'OK',
         'Search:': 'Pesquisar:',
         'Type to search servers...': 'Digite para pesquisar servidores...',
+        'Search servers, IPs, users, processes, states...': 'Pesquise servidores, IPs, usuários, processos, estados...',
         'Last update:': 'Última atualização:',
         'Next:': 'Próxima:',
         'Connected IT:': 'TI Conectado:',
         'Monitored Processes:': 'Processos Monitorados:',
         'Monitored Services:': 'Serviços Monitorados:',
         'Update': 'Atualizar',
+        'Shift+click to bypass recent results': 'Shift+clique para ignorar resultados recentes',
         'Delete': 'Excluir',
         'Processes': 'Processos',
         'Services': 'Serviços',
         'IT detected:': 'TI detectado:',
+        'Unreachable': 'Inacessível',
+        'Agent': 'Agente',
+        'CPU': 'CPU',
+        'Free memory': 'Memória livre',
+        'Disk queue': 'Fila de disco',
+        'Working set:': 'Conjunto de trabalho:',
         'Confirm Deletion': 'Confirmar Exclusão',
         'Are you sure you want to delete the server': 'Tem certeza que deseja excluir o servidor',
         'Configure IT Users': 'Configurar Usuários TI',
@@ -78,6 +156,68 @@ translations = {
         'Monitor Services': 'Monitorar Serviços',
         'Add Service': 'Adicionar Serviço',
         'Remove Selected Service': 'Remover Serviço Selecionado',
+        'Usage Report': 'Relatório de Uso',
+        'Install NumPy to build usage reports.': 'Instale o NumPy para gerar relatórios de uso.',
+        'No session data recorded yet.': 'Nenhum dado de sessão registrado ainda.',
+        'Over-used': 'Sobrecarregado',
+        'Under-used': 'Subutilizado',
+        'Servers': 'Servidores',
+        'Server': 'Servidor',
+        'Samples': 'Amostras',
+        'Peak': 'Pico',
+        'P95': 'P95',
+        'Mean': 'Média',
+        'Busiest hour': 'Hora de pico',
+        'Mean session (min)': 'Sessão média (min)',
+        'Usage': 'Uso',
+        'Hour of week': 'Hora da semana',
+        'Hour': 'Hora',
+        'Users': 'Usuários',
+        'User': 'Usuário',
+        'Sessions': 'Sessões',
+        'Total hours': 'Total de horas',
+        'Median session (min)': 'Sessão mediana (min)',
+        'Export CSV': 'Exportar CSV',
+        'Mon': 'Seg',
+        'Tue': 'Ter',
+        'Wed': 'Qua',
+        'Thu': 'Qui',
+        'Fri': 'Sex',
+        'Sat': 'Sáb',
+        'Sun': 'Dom',
+        'Events': 'Eventos',
+        'Event Log': 'Registro de Eventos',
+        'All events': 'Todos os eventos',
+        'Filter by server, user, service or message...': 'Filtrar por servidor, usuário, serviço ou mensagem...',
+        'Time': 'Horário',
+        'Event': 'Evento',
+        'Subject': 'Assunto',
+        'Details': 'Detalhes',
+        'Logon': 'Logon',
+        'Logoff': 'Logoff',
+        'Service started': 'Serviço iniciado',
+        'Service stopped': 'Serviço parado',
+        'Process started': 'Processo iniciado',
+        'Process stopped': 'Processo parado',
+        'Probe error': 'Erro de consulta',
+        'Timeout': 'Tempo esgotado',
+        'Recovered': 'Recuperado',
+        'Slow poll': 'Consulta lenta',
+        'Group:': 'Grupo:',
+        'Ungrouped': 'Sem grupo',
+        'Expand': 'Expandir',
+        'Collapse': 'Recolher',
+        'critical': 'crítico',
+        'normal': 'normal',
+        'low': 'baixo',
+        'every': 'a cada',
+        'servers': 'servidores',
+        'online': 'online',
+        'unreachable': 'inacessíveis',
+        'errors': 'erros',
+        'sessions': 'sessões',
+        'matches': 'resultados',
+        'A server with this name already exists.': 'Já existe um servidor com este nome.',
     }
 }
 
@@ -86,4 +226,13 @@ class Translator:
         self.language = language
 
     def translate(self, text):
-        return translations[self.language].get(text, text)
\ No newline at end of file
+        return translations[self.language].get(text, text)
+
+
+# Global translator
+translator = Translator('en')  # Default to English
+
+
+# Helper function to translate text
+def _(text):
+    return translator.translate(text)